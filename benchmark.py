@@ -0,0 +1,421 @@
+"""
+Benchmarks reproducibles de los solucionadores de Sudoku y del optimizador de horarios.
+
+Mide:
+- evaluaciones de fitness por segundo (listas, tablas de conteo y motor tensorial)
+- generaciones por segundo de cada algoritmo_genetico
+- distribución del tiempo hasta la solución sobre un corpus sembrado, por dificultad
+- tiempo hasta la solución del GA con y sin control de convergencia
+- tiempo hasta la solución del GA con propagación en una población y en islas
+- generaciones por segundo de OptimizadorMaestro.ejecutar
+- curva de escalado del optimizador de horarios (20 a 20k secciones sintéticas)
+- generaciones hasta un horario sin choques, sin y con el paso memético de reparación
+- tasa de acierto y tiempo de búsqueda de la cache de formas canónicas
+- fitness, generaciones por segundo y memoria por individuo en 9x9, 16x16 y 25x25
+
+Los resultados se escriben en JSON para comparar revisiones automáticamente.
+
+Uso:
+    python benchmark.py -o base.json
+    python benchmark.py -o nuevo.json --comparar-con base.json
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+import sudoku_exacto
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Cantidad de pistas de cada nivel del corpus sembrado
+NIVELES = {"facil": 38, "medio": 30, "dificil": 24}
+
+
+# ---------------- CARGA DE MÓDULOS ----------------
+def silencioso():
+    """Contexto que descarta lo que imprimen los módulos del proyecto"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def cargar_modulo(nombre, archivo):
+    """Importa un archivo del proyecto por ruta (algunos nombres tienen espacios)"""
+    spec = importlib.util.spec_from_file_location(nombre, os.path.join(DIRECTORIO, archivo))
+    modulo = importlib.util.module_from_spec(spec)
+    sys.modules[nombre] = modulo
+    with silencioso():
+        spec.loader.exec_module(modulo)
+    return modulo
+
+
+# ---------------- UTILIDADES ----------------
+def por_segundo(cantidad, funcion):
+    """Ejecuta `funcion` una vez y retorna cantidad / segundos"""
+    inicio = time.perf_counter()
+    funcion()
+    return cantidad / (time.perf_counter() - inicio)
+
+
+def distribucion(valores):
+    """Resumen de una lista de tiempos en segundos"""
+    valores = sorted(valores)
+    if not valores:
+        return {}
+    return {
+        "n": len(valores),
+        "p50": float(np.percentile(valores, 50)),
+        "p90": float(np.percentile(valores, 90)),
+        "max": valores[-1],
+        "media": float(np.mean(valores)),
+    }
+
+
+def revision_git():
+    """Commit actual del repositorio, si está disponible"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORIO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def generar_corpus(semilla, por_nivel):
+    """Corpus sembrado: {nivel: [tableros]} con solución única"""
+    rng = random.Random(semilla)
+    return {nivel: [sudoku_exacto.generar_puzzle(pistas, rng) for _ in range(por_nivel)]
+            for nivel, pistas in NIVELES.items()}
+
+
+# ---------------- BENCHMARKS ----------------
+def bench_fitness(sudoku, opt, semilla, n):
+    """Evaluaciones de fitness por segundo de cada implementación"""
+    tablero = sudoku.sudoku_inicial
+    contexto = sudoku.ContextoSudoku(tablero)
+    rng = np.random.default_rng(semilla)
+    individuos = [sudoku.crear_individuo(contexto, rng) for _ in range(n)]
+    tensor = opt.a_tensor(individuos)
+
+    def tablas():
+        for t in individuos:
+            sudoku.fitness_desde_tablas(*sudoku.crear_tablas_conteo(t))
+
+    return {
+        "calcular_fitness_por_seg": por_segundo(n, lambda: [sudoku.calcular_fitness(t) for t in individuos]),
+        "fitness_optimizado_por_seg": por_segundo(n, lambda: [opt.fitness(t) for t in individuos]),
+        "tablas_conteo_por_seg": por_segundo(n, tablas),
+        "fitness_tensor_por_seg": por_segundo(n, lambda: opt.fitness_tensor(tensor)),
+    }
+
+
+def bench_generaciones(sudoku, opt, semilla, generaciones):
+    """Generaciones por segundo de cada algoritmo genético (población 100)"""
+    tablero = sudoku.sudoku_inicial
+    fijas = sudoku.obtener_posiciones_fijas(tablero)
+    resultados = {}
+
+    inicio = time.perf_counter()
+    with silencioso():
+        _, _, _, gen_solucion, _ = sudoku.algoritmo_genetico(tablero, fijas, 100, generaciones, semilla=semilla)
+    corridas = gen_solucion if gen_solucion > 0 else generaciones
+    resultados["sudoku_por_seg"] = corridas / (time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    with silencioso():
+        _, hist, _ = opt.algoritmo_genetico(tablero, 100, generaciones, semilla=semilla)
+    resultados["optimizado_por_seg"] = len(hist) / (time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    with silencioso():
+        _, hist, _ = opt.algoritmo_genetico_tensor(tablero, 100, generaciones, semilla)
+    resultados["tensor_por_seg"] = len(hist) / (time.perf_counter() - inicio)
+    return resultados
+
+
+def bench_tiempo_solucion(lote, corpus, semilla, generaciones):
+    """Distribución del tiempo hasta la solución por nivel y modo"""
+    resultados = {}
+    for nivel, puzzles in corpus.items():
+        resultados[nivel] = {}
+        for modo in ("exacto", "hibrido", "ga"):
+            tiempos, resueltos = [], 0
+            for tablero in puzzles:
+                r = lote.resolver_uno(tablero, generaciones=generaciones, modo=modo, propagar=True, semilla=semilla)
+                tiempos.append(r['segundos'])
+                resueltos += r['fitness'] == 0
+            resultados[nivel][modo] = {"segundos": distribucion(tiempos), "resueltos": resueltos}
+    return resultados
+
+
+def bench_convergencia(lote, corpus, semilla, generaciones):
+    """Tiempo hasta la solución del GA (sin propagación) con presupuesto fijo y con control de convergencia.
+    Los puzzles sin resolver cuentan con el tiempo que consumieron.
+    """
+    resultados = {}
+    for nivel, puzzles in corpus.items():
+        resultados[nivel] = {}
+        for nombre, adaptativo in (("fijo", False), ("adaptativo", True)):
+            tiempos, resueltos = [], 0
+            for tablero in puzzles:
+                r = lote.resolver_uno(tablero, generaciones=generaciones, adaptativo=adaptativo, semilla=semilla)
+                tiempos.append(r['segundos'])
+                resueltos += r['fitness'] == 0
+            resultados[nivel][nombre] = {"segundos": distribucion(tiempos), "resueltos": resueltos}
+    return resultados
+
+
+def bench_islas(lote, corpus, semilla, generaciones, num_islas=4):
+    """Tiempo hasta la solución y resueltos del GA con propagación en una población y en `num_islas` islas
+    (población 100 por isla, migración en anillo)
+    """
+    resultados = {}
+    for nivel, puzzles in corpus.items():
+        resultados[nivel] = {}
+        for nombre, islas in (("una_poblacion", 0), ("islas", num_islas)):
+            tiempos, resueltos = [], 0
+            for tablero in puzzles:
+                r = lote.resolver_uno(tablero, generaciones=generaciones, propagar=True, semilla=semilla, islas=islas)
+                tiempos.append(r['segundos'])
+                resueltos += r['fitness'] == 0
+            resultados[nivel][nombre] = {"segundos": distribucion(tiempos), "resueltos": resueltos}
+    return resultados
+
+
+def bench_horario(horario, semilla, generaciones, n):
+    """Generaciones por segundo de OptimizadorMaestro.ejecutar y evaluaciones por segundo"""
+    motor = horario.OptimizadorMaestro()
+    poblacion = motor.crear_poblacion(n, np.random.default_rng(semilla))
+    individuos = [motor.decodificar(g) for g in poblacion]
+    resultados = {
+        "calcular_fitness_por_seg": por_segundo(n, lambda: [motor.calcular_fitness(i) for i in individuos]),
+        "fitness_genoma_por_seg": por_segundo(n, lambda: [motor.calcular_fitness_genoma(g) for g in poblacion]),
+        "fitness_lote_por_seg": por_segundo(n, lambda: motor.calcular_fitness_lote(poblacion)),
+    }
+
+    inicio = time.perf_counter()
+    with silencioso():
+        _, historial = motor.ejecutar(generaciones=generaciones, semilla=semilla)
+    resultados["ejecutar_por_seg"] = len(historial) / (time.perf_counter() - inicio)
+    return resultados
+
+
+def bench_escalado(horario, semilla, tamaños, generaciones=3, poblacion=100):
+    """Segundos por generación de ejecutar() sobre instancias sintéticas de cada tamaño"""
+    resultados = {}
+    for n in tamaños:
+        inicio = time.perf_counter()
+        motor = horario.generar_instancia(n, semilla)
+        preparacion = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        with silencioso():
+            _, historial = motor.ejecutar(generaciones, poblacion, mostrar_horarios=False, semilla=semilla)
+        resultados[str(n)] = {
+            "segundos_preparacion": preparacion,
+            "segundos_por_generacion": (time.perf_counter() - inicio) / len(historial),
+        }
+    return resultados
+
+
+def bench_reparacion(horario, semilla, tamaños, generaciones):
+    """Generaciones y segundos hasta un horario sin choques, sin y con reparar_genoma.
+    'factible' dice si se alcanzó; si no, 'generaciones' son todas las corridas.
+    """
+    resultados = {}
+    for n in tamaños:
+        motor = horario.generar_instancia(n, semilla)
+        resultados[str(n)] = {}
+        for nombre, reparar in (("sin_reparacion", 0), ("con_reparacion", 5)):
+            inicio = time.perf_counter()
+            with silencioso():
+                mejor, historial = motor.ejecutar(generaciones, 100, mostrar_horarios=False,
+                                                  reparar=reparar, hasta_factible=True, semilla=semilla)
+            factible = not any(motor.analizar_individuo(mejor))
+            resultados[str(n)][nombre] = {
+                "factible": factible,
+                "generaciones": len(historial) - 1,
+                "segundos": time.perf_counter() - inicio,
+            }
+    return resultados
+
+
+def bench_cache(cache_sudoku, lote, corpus, semilla, generaciones, variantes=3):
+    """Tráfico con duplicados y variantes simétricas del corpus resuelto con el GA, sin y con CacheSoluciones"""
+    rng = np.random.default_rng(semilla)
+    trafico = []
+    for tablero in (t for puzzles in corpus.values() for t in puzzles):
+        trafico += [tablero, tablero]
+        trafico += [cache_sudoku.transformacion_aleatoria(rng).aplicar(tablero) for _ in range(variantes)]
+    trafico = [trafico[k] for k in rng.permutation(len(trafico))]
+    opciones = {"modo": "ga", "propagar": True, "generaciones": generaciones, "semilla": semilla}
+
+    resultados = {
+        "forma_canonica_por_seg": por_segundo(len(trafico),
+                                              lambda: [cache_sudoku.forma_canonica(t) for t in trafico]),
+    }
+    with silencioso():
+        resultados["sin_cache_por_seg"] = por_segundo(len(trafico),
+                                                      lambda: [lote.resolver_uno(t, **opciones) for t in trafico])
+        cache = cache_sudoku.CacheSoluciones()
+        resultados["con_cache_por_seg"] = por_segundo(len(trafico),
+                                                      lambda: [cache.resolver(t, **opciones) for t in trafico])
+    estadisticas = cache.estadisticas()
+    resultados["tasa_acierto"] = estadisticas["tasa_acierto"]
+    resultados["busqueda_segundos"] = {k: estadisticas["busqueda"][k] for k in ("media", "p50", "p99")}
+    return resultados
+
+
+def bench_tamaños(sudoku, opt, semilla, n, generaciones, cajas=(3, 4, 5), fraccion_pistas=0.6):
+    """Por tamaño (9x9, 16x16, 25x25): evaluaciones de fitness por segundo de cada implementación,
+    generaciones por segundo de cada GA (población 100, sin propagación) y bytes por individuo
+    en listas y en el tensor uint8. En 16x16 y 25x25 las pistas no garantizan solución única.
+    """
+    resultados = {}
+    for caja in cajas:
+        lado = caja * caja
+        tablero = sudoku_exacto.generar_puzzle(int(lado * lado * fraccion_pistas), random.Random(semilla),
+                                               caja, unica=caja == 3)
+        contexto = sudoku.ContextoSudoku(tablero)
+        rng = np.random.default_rng(semilla)
+        individuos = [sudoku.crear_individuo(contexto, rng) for _ in range(n)]
+        tensor = opt.a_tensor(individuos)
+
+        def tablas():
+            for t in individuos:
+                sudoku.fitness_desde_tablas(*sudoku.crear_tablas_conteo(t))
+
+        r = {
+            "calcular_fitness_por_seg": por_segundo(n, lambda: [sudoku.calcular_fitness(t) for t in individuos]),
+            "fitness_optimizado_por_seg": por_segundo(n, lambda: [opt.fitness(t) for t in individuos]),
+            "tablas_conteo_por_seg": por_segundo(n, tablas),
+            "fitness_tensor_por_seg": por_segundo(n, lambda: opt.fitness_tensor(tensor)),
+            # Solo las listas: los enteros pequeños son objetos compartidos
+            "bytes_lista": sys.getsizeof(individuos[0]) + sum(sys.getsizeof(f) for f in individuos[0]),
+            "bytes_tensor": tensor[0].nbytes,
+        }
+
+        fijas = sudoku.obtener_posiciones_fijas(tablero)
+        inicio = time.perf_counter()
+        with silencioso():
+            _, _, _, gen_solucion, _ = sudoku.algoritmo_genetico(tablero, fijas, 100, generaciones, semilla=semilla)
+        corridas = gen_solucion if gen_solucion > 0 else generaciones
+        r["sudoku_por_seg"] = corridas / (time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        with silencioso():
+            _, hist, _ = opt.algoritmo_genetico(tablero, 100, generaciones, semilla=semilla)
+        r["optimizado_por_seg"] = len(hist) / (time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        with silencioso():
+            _, hist, _ = opt.algoritmo_genetico_tensor(tablero, 100, generaciones, semilla)
+        r["tensor_por_seg"] = len(hist) / (time.perf_counter() - inicio)
+        r["tensor_fitness_final"] = hist[-1]
+        resultados[f"{lado}x{lado}"] = r
+    return resultados
+
+
+def ejecutar_benchmarks(semilla=0, rapido=False):
+    """Corre todos los benchmarks y retorna el informe como dict"""
+    sudoku = cargar_modulo("sudoku", "sudoku.py")
+    opt = cargar_modulo("sudoku_optimizado", "sudoku _optimizado.py")
+    lote = cargar_modulo("sudoku_lote", "sudoku_lote.py")
+    horario = cargar_modulo("horario_optimizado", "horario_optimizado.py")
+    cache_sudoku = cargar_modulo("cache_sudoku", "cache_sudoku.py")
+
+    escala = 0.1 if rapido else 1
+    corpus = generar_corpus(semilla, 2 if rapido else 10)
+    return {
+        "revision": revision_git(),
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "semilla": semilla,
+        "rapido": rapido,
+        "resultados": {
+            "fitness": bench_fitness(sudoku, opt, semilla, int(20000 * escala)),
+            "generaciones": bench_generaciones(sudoku, opt, semilla, int(200 * escala)),
+            "tiempo_solucion": bench_tiempo_solucion(lote, corpus, semilla, int(300 * escala)),
+            "convergencia": bench_convergencia(lote, corpus, semilla, int(2000 * escala)),
+            "islas": bench_islas(lote, corpus, semilla, int(300 * escala)),
+            "horario": bench_horario(horario, semilla, int(200 * escala), int(5000 * escala)),
+            "horario_escalado": bench_escalado(horario, semilla, (20, 200, 2000) if rapido else (20, 200, 2000, 20000)),
+            "cache": bench_cache(cache_sudoku, lote, corpus, semilla, int(300 * escala)),
+            "tamaños": bench_tamaños(sudoku, opt, semilla, int(2000 * escala), int(200 * escala)),
+            "horario_reparacion": bench_reparacion(horario, semilla, (200,) if rapido else (200, 2000), int(300 * escala) or 1),
+        },
+    }
+
+
+# ---------------- COMPARACIÓN ----------------
+def aplanar(datos, prefijo=""):
+    """{'a': {'b': 1}} -> {'a.b': 1}, solo valores numéricos y booleanos"""
+    plano = {}
+    for clave, valor in datos.items():
+        nombre = f"{prefijo}{clave}"
+        if isinstance(valor, dict):
+            plano.update(aplanar(valor, nombre + "."))
+        elif isinstance(valor, (int, float)):
+            plano[nombre] = valor
+    return plano
+
+
+def comparar(anterior, actual, tolerancia=0.1):
+    """
+    Lista las métricas que empeoraron más que `tolerancia` (fracción).
+    Las métricas *_por_seg, 'resueltos' y 'tasa_acierto' son mejores cuanto más altas;
+    los tiempos en segundos, cuanto más bajos. Un booleano (p. ej. 'factible')
+    empeora si pasa de True a False.
+    """
+    viejas = aplanar(anterior["resultados"])
+    nuevas = aplanar(actual["resultados"])
+    regresiones = []
+    for nombre, viejo in viejas.items():
+        nuevo = nuevas.get(nombre)
+        if nuevo is None or viejo == 0 or nombre.endswith(".n"):
+            continue
+        if viejo < 0 or nuevo < 0:
+            continue  # -1 = objetivo no alcanzado en informes anteriores a 'factible'
+        if isinstance(viejo, bool):
+            if not nuevo:
+                regresiones.append((nombre, viejo, nuevo, -1.0))
+            continue
+        mas_es_mejor = nombre.endswith(("_por_seg", "resueltos", "tasa_acierto"))
+        cambio = (nuevo - viejo) / abs(viejo)
+        if (mas_es_mejor and cambio < -tolerancia) or (not mas_es_mejor and cambio > tolerancia):
+            regresiones.append((nombre, viejo, nuevo, cambio))
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de los solucionadores y del optimizador de horarios")
+    parser.add_argument("-o", "--salida", default="benchmark.json", help="archivo JSON de resultados")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--rapido", action="store_true", help="tamaños reducidos, para pruebas rápidas")
+    parser.add_argument("--comparar-con", help="JSON de una revisión anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=0.1, help="empeoramiento tolerado (fracción)")
+    args = parser.parse_args(argv)
+
+    informe = ejecutar_benchmarks(args.semilla, args.rapido)
+    with open(args.salida, "w") as archivo:
+        json.dump(informe, archivo, indent=2, ensure_ascii=False)
+    print(f"✓ Resultados guardados en {args.salida}")
+
+    if args.comparar_con:
+        with open(args.comparar_con) as archivo:
+            regresiones = comparar(json.load(archivo), informe, args.tolerancia)
+        for nombre, viejo, nuevo, cambio in regresiones:
+            print(f"⚠️ {nombre}: {viejo:.4g} -> {nuevo:.4g} ({cambio:+.0%})")
+        if regresiones:
+            sys.exit(1)
+        print("✓ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Cache de soluciones de Sudoku por forma canónica.
+
+Dos puzzles son equivalentes si uno se obtiene del otro renombrando los
+dígitos, permutando filas dentro de una banda o columnas dentro de una pila,
+permutando bandas o pilas, o transponiendo. Todos comparten la misma forma
+canónica: el menor de los tableros equivalentes, con los dígitos numerados
+por orden de aparición, comparando fila por fila primero el patrón de
+celdas vacías (más vacías al principio, mejor) y después los dígitos.
+
+La cache guarda la solución del puzzle canónico y, en cada acierto, la lleva
+de vuelta al puzzle pedido con la transformación inversa. Mantiene un LRU en
+memoria y, opcionalmente, un archivo SQLite que sobrevive entre corridas y
+se puede compartir entre procesos.
+
+    cache = CacheSoluciones(ruta="soluciones.sqlite")
+    resultado = cache.resolver(tablero, modo="hibrido")
+    print(cache.estadisticas()["tasa_acierto"])
+
+Uso:
+    python cache_sudoku.py                 # verifica la cache sobre corpus/
+    python cache_sudoku.py puzzles.sdm --variantes 10
+"""
+import argparse
+import collections
+import functools
+import glob
+import itertools
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+import sudoku
+import sudoku_lote
+from perfilado import Histograma
+
+# Con menos pistas un Sudoku nunca tiene solución única, y sus muchas
+# simetrías hacen muy cara la forma canónica: esos puzzles no pasan por la cache
+MIN_PISTAS = 17
+
+# Límites (en segundos) de los tramos del histograma de búsqueda
+TRAMOS_BUSQUEDA = (1e-5, 2e-5, 5e-5, 1e-4, 2e-4, 5e-4, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1)
+
+# Los 1296 órdenes de columnas que respetan las pilas (igual para filas y bandas)
+_GRUPOS = [(0, 1, 2), (3, 4, 5), (6, 7, 8)]
+COLUMNAS = np.array([[c for pila in orden_pilas for c in internos[pila]]
+                     for orden_pilas in itertools.permutations(range(3))
+                     for internos in itertools.product(*(list(itertools.permutations(g)) for g in _GRUPOS))],
+                    dtype=np.intp)
+_PESOS = 10 ** np.arange(8, -1, -1, dtype=np.int64)
+_BITS = 2 ** np.arange(8, -1, -1, dtype=np.int64)
+# Con tantos candidatos o menos, forma_canonica sigue en Python puro
+_POCOS_CANDIDATOS = 16
+
+
+@functools.lru_cache(maxsize=None)
+def _tabla_patrones():
+    """(tabla, minimo): tabla[c, m] es el patrón de celdas ocupadas (9 bits, la
+    primera columna es el bit más alto) de una fila con patrón `m` tras reordenar
+    sus columnas según COLUMNAS[c]; minimo[m] es el menor sobre todos los órdenes"""
+    bits = (np.arange(512)[:, None] >> (8 - np.arange(9))) & 1
+    tabla = (bits[:, COLUMNAS].astype(np.int16) @ _BITS.astype(np.int16)).T.copy()
+    return tabla, tabla.min(axis=0)
+
+
+class Transformacion:
+    """
+    Simetría de Sudoku: transponer (o no), reordenar filas y columnas y renombrar dígitos.
+    aplicar(t)[i][j] = digitos[t'[filas[i]][columnas[j]]], con t' = t transpuesto si corresponde.
+    """
+    __slots__ = ("transpuesta", "filas", "columnas", "digitos")
+
+    def __init__(self, transpuesta, filas, columnas, digitos):
+        self.transpuesta = transpuesta
+        self.filas = tuple(filas)
+        self.columnas = tuple(columnas)
+        self.digitos = tuple(digitos)
+
+    def aplicar(self, tablero):
+        """Tablero original -> tablero transformado"""
+        if self.transpuesta:
+            tablero = [list(col) for col in zip(*tablero)]
+        return [[self.digitos[tablero[f][c]] for c in self.columnas] for f in self.filas]
+
+    def invertir(self, tablero):
+        """Tablero transformado -> tablero original"""
+        originales = [0] * 10
+        for v, d in enumerate(self.digitos):
+            originales[d] = v
+        resultado = [[0] * 9 for _ in range(9)]
+        for i, f in enumerate(self.filas):
+            for j, c in enumerate(self.columnas):
+                resultado[f][c] = originales[tablero[i][j]]
+        if self.transpuesta:
+            resultado = [list(col) for col in zip(*resultado)]
+        return resultado
+
+
+def transformacion_aleatoria(rng):
+    """Transformación al azar con un np.random.Generator (para pruebas y benchmarks)"""
+    def orden():
+        return [int(x) for b in rng.permutation(3) for x in 3 * b + rng.permutation(3)]
+
+    return Transformacion(bool(rng.integers(2)), orden(), orden(), [0] + (1 + rng.permutation(9)).tolist())
+
+
+def _completar_forma(matrices, estados, k, clave):
+    """
+    Filas k..8 de forma_canonica con pocos candidatos, en Python puro (cada
+    operación de NumPy cuesta más que recorrer unas pocas filas a mano).
+    `estados` son listas [trans, columnas, filas, mapa, siguiente].
+    """
+    for k in range(k, 9):
+        mejor, siguientes = None, []
+        for trans, columnas, filas, mapa, siguiente in estados:
+            if k % 3 == 0:
+                bandas = {f // 3 for f in filas}
+                posibles = [f for f in range(9) if f // 3 not in bandas]
+            else:
+                banda = filas[-1] // 3
+                posibles = [f for f in range(3 * banda, 3 * banda + 3) if f not in filas]
+            for f in posibles:
+                valores = matrices[trans][f]
+                nuevo_mapa, nuevo_siguiente, salida = mapa[:], siguiente, []
+                for c in columnas:
+                    v = valores[c]
+                    if nuevo_mapa[v] < 0:
+                        nuevo_mapa[v] = nuevo_siguiente
+                        nuevo_siguiente += 1
+                    salida.append(nuevo_mapa[v])
+                orden = ([v != 0 for v in salida], salida)
+                if mejor is None or orden < mejor:
+                    mejor, siguientes = orden, []
+                if orden == mejor:
+                    siguientes.append([trans, columnas, filas + [f], nuevo_mapa, nuevo_siguiente])
+        clave.append(mejor[1])
+        estados = siguientes
+    return estados[0]
+
+
+def forma_canonica(tablero):
+    """
+    (clave, transformacion): `clave` es la forma canónica como línea de 81
+    caracteres y transformacion.aplicar(tablero) la reconstruye.
+
+    Recorre las filas de salida en orden y en cada paso conserva solo los
+    prefijos (transposición, filas elegidas, orden de columnas, numeración)
+    que dan la menor fila (por patrón de vacías y luego por dígitos); los
+    empates siguen todos, así que el resultado es el mínimo exacto. Mientras hay muchos candidatos se evalúan en bloque con
+    NumPy; cuando quedan pocos, en Python puro.
+    """
+    base = np.array(tablero, dtype=np.int64)
+    matrices = np.stack([base, base.T])
+    ocupadas = (matrices != 0) @ _BITS
+    tabla, minimo = _tabla_patrones()
+    # Estado de cada prefijo candidato
+    trans = np.repeat(np.arange(2), len(COLUMNAS))
+    cols = np.tile(np.arange(len(COLUMNAS)), 2)
+    filas = np.empty((len(trans), 0), dtype=np.intp)
+    mapa = np.full((len(trans), 10), -1, dtype=np.int64)
+    mapa[:, 0] = 0
+    siguiente = np.ones(len(trans), dtype=np.int64)
+    clave = []
+
+    k = 0
+    while k < 9 and len(trans) > _POCOS_CANDIDATOS:
+        # Fila de entrada para la posición k: sin repetir, de una banda nueva
+        # al empezar banda y de la banda en curso en las demás posiciones
+        estado = np.repeat(np.arange(len(trans)), 9)
+        fila = np.tile(np.arange(9), len(trans))
+        if k:
+            previas = filas[estado]
+            libre = (previas != fila[:, None]).all(axis=1)
+            if k % 3 == 0:
+                libre &= (previas // 3 != fila[:, None] // 3).all(axis=1)
+            else:
+                libre &= previas[:, -1] // 3 == fila // 3
+        else:
+            # Todas las columnas están disponibles: basta el mejor patrón alcanzable por fila
+            alcanzable = minimo[ocupadas]
+            libre = (alcanzable == alcanzable.min())[trans[estado], fila]
+        estado, fila = estado[libre], fila[libre]
+
+        # Fila k de salida de cada candidato: primero decide el patrón de celdas
+        # vacías (barato, no depende de la numeración) y solo los que empatan
+        # en él pagan la numeración de los dígitos
+        patron = tabla[cols[estado], ocupadas[trans[estado], fila]]
+        mejores = patron == patron.min()
+        estado, fila = estado[mejores], fila[mejores]
+        valores = matrices[trans[estado][:, None], fila[:, None], COLUMNAS[cols[estado]]]
+        nuevo_mapa = mapa[estado]
+        nuevo_siguiente = siguiente[estado]
+        salida = np.empty_like(valores)
+        indice = np.arange(len(estado))
+        for j in range(9):
+            v = valores[:, j]
+            sin_nombre = nuevo_mapa[indice, v] < 0
+            nuevo_mapa[indice[sin_nombre], v[sin_nombre]] = nuevo_siguiente[sin_nombre]
+            nuevo_siguiente += sin_nombre
+            salida[:, j] = nuevo_mapa[indice, v]
+
+        codigos = salida @ _PESOS
+        minimos = codigos == codigos.min()
+        clave.append(salida[minimos][0].tolist())
+        estado = estado[minimos]
+        trans, cols = trans[estado], cols[estado]
+        filas = np.concatenate([filas[estado], fila[minimos][:, None]], axis=1)
+        mapa, siguiente = nuevo_mapa[minimos], nuevo_siguiente[minimos]
+        k += 1
+
+    estados = [[t, COLUMNAS[c].tolist(), f, m, s] for t, c, f, m, s in
+               zip(trans.tolist(), cols.tolist(), filas.tolist(), mapa.tolist(), siguiente.tolist())]
+    t, columnas, filas, digitos, _ = _completar_forma(matrices.tolist(), estados, k, clave)
+
+    # Los dígitos que no aparecen en el puzzle reciben los nombres libres en orden
+    libres = iter(sorted(set(range(1, 10)) - set(digitos)))
+    digitos = [d if d >= 0 else next(libres) for d in digitos]
+    transformacion = Transformacion(bool(t), filas, columnas, digitos)
+    return "".join(str(v) for fila in clave for v in fila), transformacion
+
+
+# ---------------- CACHE ----------------
+class CacheSoluciones:
+    """
+    Soluciones por forma canónica: LRU en memoria de `capacidad` puzzles y,
+    con `ruta`, un archivo SQLite detrás. Solo se guardan soluciones completas.
+    """
+
+    def __init__(self, capacidad=10000, ruta=None):
+        self.capacidad = capacidad
+        self._memoria = collections.OrderedDict()
+        # Puzzles ya vistos tal cual -> (clave, transformacion): los duplicados
+        # exactos no pagan la canonicalización
+        self._formas = collections.OrderedDict()
+        self._db = None
+        if ruta is not None:
+            self._db = sqlite3.connect(ruta)
+            self._db.execute("CREATE TABLE IF NOT EXISTS soluciones (clave TEXT PRIMARY KEY, solucion TEXT NOT NULL)")
+            self._db.commit()
+        self.contadores = {"consultas": 0, "aciertos_memoria": 0, "aciertos_disco": 0, "fallos": 0, "omitidas": 0,
+                           "guardadas": 0}
+        self.busqueda = Histograma(TRAMOS_BUSQUEDA)
+        _tabla_patrones()  # se arma una vez aquí y no en la primera búsqueda
+
+    def cerrar(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    def _recordar(self, diccionario, clave, valor):
+        diccionario[clave] = valor
+        diccionario.move_to_end(clave)
+        if len(diccionario) > self.capacidad:
+            diccionario.popitem(last=False)
+
+    def _forma(self, tablero):
+        """(clave, transformacion) del tablero, o None si tiene menos de MIN_PISTAS pistas
+        o no es de 9x9 (las simetrías de la forma canónica son las de 9x9)"""
+        if len(tablero) != 9:
+            return None
+        linea = sudoku_lote.a_linea(tablero)
+        if 81 - linea.count("0") < MIN_PISTAS:
+            return None
+        forma = self._formas.get(linea)
+        if forma is None:
+            forma = forma_canonica(tablero)
+            self._recordar(self._formas, linea, forma)
+        else:
+            self._formas.move_to_end(linea)
+        return forma
+
+    def buscar(self, tablero):
+        """Solución del tablero si la cache tiene la de algún puzzle equivalente; si no, None"""
+        inicio = time.perf_counter()
+        self.contadores["consultas"] += 1
+        forma = self._forma(tablero)
+        if forma is None:
+            self.contadores["omitidas"] += 1
+            return None
+        clave, transformacion = forma
+        solucion = self._memoria.get(clave)
+        if solucion is not None:
+            self._memoria.move_to_end(clave)
+            self.contadores["aciertos_memoria"] += 1
+        elif self._db is not None:
+            fila = self._db.execute("SELECT solucion FROM soluciones WHERE clave = ?", (clave,)).fetchone()
+            if fila is not None:
+                solucion = fila[0]
+                self._recordar(self._memoria, clave, solucion)
+                self.contadores["aciertos_disco"] += 1
+        if solucion is None:
+            self.contadores["fallos"] += 1
+        else:
+            solucion = transformacion.invertir(sudoku_lote.leer_puzzle(solucion))
+        self.busqueda.observar(time.perf_counter() - inicio)
+        return solucion
+
+    def guardar(self, tablero, solucion):
+        """Guarda la solución de `tablero` en su forma canónica"""
+        forma = self._forma(tablero)
+        if forma is None:
+            return
+        clave, transformacion = forma
+        canonica = sudoku_lote.a_linea(transformacion.aplicar(solucion))
+        self._recordar(self._memoria, clave, canonica)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO soluciones VALUES (?, ?)", (clave, canonica))
+            self._db.commit()
+        self.contadores["guardadas"] += 1
+
+    def consultar(self, tablero):
+        """Resultado con el formato de resolver_uno ('metodo' = "cache") si hay acierto; si no, None"""
+        inicio = time.perf_counter()
+        solucion = self.buscar(tablero)
+        if solucion is None:
+            return None
+        return {'solucion': solucion, 'fitness': 0, 'generacion': 0,
+                'segundos': time.perf_counter() - inicio, 'metodo': "cache"}
+
+    def resolver(self, tablero, resolvedor=sudoku_lote.resolver_uno, **opciones):
+        """
+        Como resolver_uno (u otro `resolvedor` con el mismo resultado), pero
+        consulta la cache antes y guarda la solución después.
+        """
+        resultado = self.consultar(tablero)
+        if resultado is None:
+            resultado = resolvedor(tablero, **opciones)
+            self.registrar(tablero, resultado)
+        return resultado
+
+    def registrar(self, tablero, resultado):
+        """Guarda el resultado de un resolvedor si trae una solución completa"""
+        if resultado.get('fitness') == 0:
+            self.guardar(tablero, resultado['solucion'])
+
+    def estadisticas(self):
+        """Contadores, tasa de acierto e histograma del tiempo de búsqueda"""
+        consultas = self.contadores["consultas"]
+        aciertos = self.contadores["aciertos_memoria"] + self.contadores["aciertos_disco"]
+        return {**self.contadores, "en_memoria": len(self._memoria),
+                "tasa_acierto": aciertos / consultas if consultas else 0.0,
+                "busqueda": self.busqueda.a_dict()}
+
+
+def verificar_cache(puzzles, semilla=0, variantes=5):
+    """
+    Comprueba que las variantes simétricas de cada puzzle tienen la misma forma
+    canónica y que la solución guardada de uno resuelve a los demás.
+    """
+    rng = np.random.default_rng(semilla)
+    with CacheSoluciones() as cache:
+        for tablero in puzzles:
+            clave, transformacion = forma_canonica(tablero)
+            assert sudoku_lote.a_linea(transformacion.aplicar(tablero)) == clave
+            resultado = cache.resolver(tablero, modo="exacto")
+            for _ in range(variantes):
+                variante = transformacion_aleatoria(rng).aplicar(tablero)
+                assert forma_canonica(variante)[0] == clave, "Variantes simétricas con distinta forma canónica"
+                solucion = cache.buscar(variante)
+                if resultado['fitness'] == 0:
+                    assert solucion is not None
+                    assert all(v == 0 or v == s for fv, fs in zip(variante, solucion) for v, s in zip(fv, fs))
+                    assert sudoku.calcular_fitness(solucion) == 0
+        return cache.estadisticas()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verifica la cache de soluciones por forma canónica")
+    parser.add_argument("archivos", nargs="*",
+                        help="archivos .sdm a verificar (por defecto, los de corpus/)")
+    parser.add_argument("--variantes", type=int, default=5, help="variantes simétricas por puzzle")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    archivos = args.archivos or sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                              "corpus", "*.sdm")))
+    puzzles = [tablero for ruta in archivos for tablero in sudoku_lote.leer_archivo(ruta)]
+    estadisticas = verificar_cache(puzzles, args.semilla, args.variantes)
+    print(f"✓ Forma canónica y soluciones verificadas en {len(puzzles)} puzzles "
+          f"({args.variantes} variantes cada uno, tasa de acierto {estadisticas['tasa_acierto']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
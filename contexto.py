@@ -0,0 +1,206 @@
+"""
+Contexto de un Sudoku: todo lo que los operadores genéticos necesitan saber
+del tablero inicial, calculado una sola vez por puzzle.
+
+Los operadores reciben el contexto como argumento en lugar de recalcular las
+celdas libres en cada hijo o de leer un tablero global, así que varios
+puzzles pueden resolverse a la vez en el mismo proceso.
+
+permutacion_con_candidatos, intercambio_permitido y par_intercambio aplican
+las máscaras de candidatos de la propagación (sudoku.propagar_restricciones)
+en los operadores de los dos archivos de Sudoku, que también comparten aquí
+el fitness incremental (crear_tablas_conteo, intercambiar_con_delta).
+
+El tamaño se deduce del tablero: un lado de N = n² celdas con cajas de n x n
+(9x9 con cajas de 3, 16x16 con cajas de 4, 25x25 con cajas de 5).
+"""
+from functools import lru_cache
+from math import isqrt
+
+
+def tamaño_caja(lado):
+    """Lado de la caja de un tablero de `lado` x `lado`; ValueError si no es un cuadrado perfecto"""
+    caja = isqrt(lado)
+    if lado < 1 or caja * caja != lado:
+        raise ValueError(f"El lado del tablero debe ser un cuadrado perfecto (9, 16, 25...), no {lado}")
+    return caja
+
+
+@lru_cache(maxsize=None)
+def cajas_de(caja):
+    """Caja a la que pertenece cada celda (fila, columna) con cajas de `caja` x `caja`"""
+    lado = caja * caja
+    return [[(i // caja) * caja + j // caja for j in range(lado)] for i in range(lado)]
+
+
+def permutacion_con_candidatos(libres, disponibles, candidatos_fila, rng):
+    """
+    Asigna los dígitos `disponibles` a las celdas `libres` de una fila de modo
+    que cada celda reciba uno de sus candidatos (backtracking con orden aleatorio
+    sacado del np.random.Generator `rng`).
+    Retorna {columna: dígito} o None si no existe tal asignación.
+    """
+    orden = sorted(libres, key=lambda j: bin(candidatos_fila[j]).count("1"))
+    asignacion = {}
+
+    def asignar(k, restantes):
+        if k == len(orden):
+            return True
+        j = orden[k]
+        opciones = [v for v in restantes if candidatos_fila[j] >> v & 1]
+        for v in [opciones[k] for k in rng.permutation(len(opciones)).tolist()]:
+            asignacion[j] = v
+            if asignar(k + 1, restantes - {v}):
+                return True
+        return False
+
+    return asignacion if asignar(0, frozenset(disponibles)) else None
+
+
+def intercambio_permitido(fila, candidatos_fila, j1, j2):
+    """Un intercambio es válido si cada valor es candidato de la otra celda"""
+    return candidatos_fila[j1] >> fila[j2] & 1 and candidatos_fila[j2] >> fila[j1] & 1
+
+
+class ContextoSudoku:
+    """
+    Datos precalculados de un tablero inicial:
+    - tablero: copia del tablero (0 = celda vacía)
+    - lado, caja: tamaño del tablero (N) y de sus cajas (n, con N = n²)
+    - fijas: matriz de booleanos, True en las celdas dadas
+    - libres[i]: columnas libres de la fila i (tupla)
+    - faltantes[i]: dígitos que faltan en la fila i, en orden creciente
+    - fijos_fila[i]: pares (columna, valor) de las celdas fijas de la fila i
+    - caja_de[i][j]: caja de la celda (i, j)
+    - candidatos: máscaras de candidatos por celda (ver propagar_restricciones) o None
+    """
+    __slots__ = ("tablero", "lado", "caja", "fijas", "libres", "faltantes", "fijos_fila", "caja_de",
+                 "candidatos")
+
+    def __init__(self, tablero, fijas=None, candidatos=None):
+        self.tablero = [list(fila) for fila in tablero]
+        self.lado = lado = len(self.tablero)
+        self.caja = tamaño_caja(lado)
+        if fijas is None:
+            fijas = [[v != 0 for v in fila] for fila in self.tablero]
+        self.fijas = [list(fila) for fila in fijas]
+        self.libres = [tuple(j for j in range(lado) if not self.fijas[i][j]) for i in range(lado)]
+        self.fijos_fila = [tuple((j, self.tablero[i][j]) for j in range(lado) if self.fijas[i][j])
+                           for i in range(lado)]
+        self.faltantes = [tuple(sorted(set(range(1, lado + 1)) - {v for _, v in self.fijos_fila[i]}))
+                          for i in range(lado)]
+        self.caja_de = cajas_de(self.caja)
+        self.candidatos = candidatos
+
+
+# Fitness incremental: tablas de conteo de dígitos por columna y por caja que
+# ambos algoritmos genéticos actualizan en O(1) por intercambio dentro de una fila
+def crear_tablas_conteo(tablero):
+    """
+    Crea las tablas de conteo de dígitos de un tablero de N x N.
+    Cada grupo ocupa N + 1 entradas (dígitos 0..N):
+    cols[j*(N+1) + v] = veces que aparece v en la columna j
+    cajas[k*(N+1) + v] = veces que aparece v en la caja k
+    """
+    lado = len(tablero)
+    paso = lado + 1
+    caja_de = cajas_de(tamaño_caja(lado))
+    cols = [0] * (lado * paso)
+    cajas = [0] * (lado * paso)
+    for i in range(lado):
+        fila = tablero[i]
+        caja_fila = caja_de[i]
+        for j in range(lado):
+            v = fila[j]
+            cols[j * paso + v] += 1
+            cajas[caja_fila[j] * paso + v] += 1
+    return cols, cajas
+
+
+def fitness_desde_tablas(cols, cajas):
+    """
+    Fitness a partir de las tablas de conteo (mismo valor que un recálculo completo).
+    Cada grupo aporta N - dígitos distintos; los distintos son las entradas no nulas.
+    Las tablas tienen N*(N+1) entradas, de donde se recupera N.
+    """
+    return cols.count(0) + cajas.count(0) - 2 * isqrt(len(cols))
+
+
+def _cambiar_conteo(tabla, base, sale, entra):
+    """Reemplaza `sale` por `entra` en un grupo y retorna el cambio de fitness"""
+    delta = 0
+    tabla[base + sale] -= 1
+    if tabla[base + sale] == 0:
+        delta += 1
+    if tabla[base + entra] == 0:
+        delta -= 1
+    tabla[base + entra] += 1
+    return delta
+
+
+def intercambiar_con_delta(tablero, cols, cajas, i, j1, j2, caja_de):
+    """
+    Intercambia las celdas (i, j1) y (i, j2) actualizando las tablas de conteo.
+    Retorna el cambio de fitness en O(1) para cualquier N: un intercambio
+    dentro de una fila solo toca 2 columnas y a lo sumo 2 cajas.
+    `caja_de` es obligatoria y debe ser la del tamaño del tablero (contexto.caja_de).
+    """
+    fila = tablero[i]
+    v1, v2 = fila[j1], fila[j2]
+    fila[j1], fila[j2] = v2, v1
+    if v1 == v2:
+        return 0
+
+    paso = len(tablero) + 1
+    delta = _cambiar_conteo(cols, j1 * paso, v1, v2) + _cambiar_conteo(cols, j2 * paso, v2, v1)
+    c1, c2 = caja_de[i][j1], caja_de[i][j2]
+    if c1 != c2:
+        delta += _cambiar_conteo(cajas, c1 * paso, v1, v2) + _cambiar_conteo(cajas, c2 * paso, v2, v1)
+    return delta
+
+
+def dos_posiciones(posiciones, u1, u2):
+    """Dos elementos distintos de `posiciones` a partir de dos números en [0, 1)"""
+    a = int(u1 * len(posiciones))
+    b = int(u2 * (len(posiciones) - 1))
+    return posiciones[a], posiciones[b + (b >= a)]
+
+
+def par_intercambio(contexto, fila, i, u1, u2):
+    """
+    Columnas (j1, j2) a intercambiar en la fila i del individuo (`fila`), o
+    None si no hay ninguna. Con candidatos, j2 se elige entre las celdas
+    compatibles con j1.
+    """
+    libres = contexto.libres[i]
+    if len(libres) < 2:
+        return None
+    if contexto.candidatos is None:
+        return dos_posiciones(libres, u1, u2)
+    j1 = libres[int(u1 * len(libres))]
+    compatibles = [j for j in libres if j != j1 and intercambio_permitido(fila, contexto.candidatos[i], j1, j)]
+    if not compatibles:
+        return None
+    return j1, compatibles[int(u2 * len(compatibles))]
+
+
+def verificar_delta(contexto, individuo, calcular_fitness, rng, intercambios=2000):
+    """
+    Comprueba el fitness incremental contra `calcular_fitness` (recálculo
+    completo) aplicando intercambios aleatorios sobre `individuo`, que se
+    modifica. `rng` es un np.random.Generator.
+    """
+    cols, cajas = crear_tablas_conteo(individuo)
+    fitness = fitness_desde_tablas(cols, cajas)
+    assert fitness == calcular_fitness(individuo)
+
+    for i, (u1, u2) in zip(rng.integers(0, contexto.lado, intercambios).tolist(),
+                           rng.random((intercambios, 2)).tolist()):
+        posiciones_libres = contexto.libres[i]
+        if len(posiciones_libres) < 2:
+            continue
+        j1, j2 = dos_posiciones(posiciones_libres, u1, u2)
+        fitness += intercambiar_con_delta(individuo, cols, cajas, i, j1, j2, contexto.caja_de)
+        assert fitness == calcular_fitness(individuo), f"Delta incorrecto en fila {i}"
+        assert (cols, cajas) == crear_tablas_conteo(individuo)
+    return True
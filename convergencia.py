@@ -0,0 +1,125 @@
+"""
+Control de convergencia para los algoritmos genéticos del proyecto.
+
+Registra en cada generación el mejor fitness, el fitness medio y la
+diversidad de la población. Si el mejor no mejora durante `paciencia`
+generaciones, sube la tasa de mutación y pide inyectar individuos nuevos;
+si la población pierde diversidad mientras está estancada, también pide
+inyectar. Tras `limite` generaciones sin mejora pide reiniciar la población
+desde cero o detenerse, según `al_limite`.
+
+Cada algoritmo genético aplica las acciones a su propia representación:
+el controlador solo decide.
+"""
+# Acciones que puede pedir el controlador al final de una generación
+INYECTAR = "inyectar"
+REINICIAR = "reiniciar"
+DETENER = "detener"
+
+
+def diversidad(poblacion):
+    """Fracción de individuos distintos de la población (1.0 = todos diferentes).
+    Acepta una lista de tableros (listas de listas) o un arreglo NumPy con un
+    individuo por fila del primer eje.
+    """
+    if len(poblacion) == 0:
+        return 0.0
+    if hasattr(poblacion, "tobytes"):
+        distintos = {fila.tobytes() for fila in poblacion.reshape(len(poblacion), -1)}
+    else:
+        distintos = {tuple(map(tuple, t)) for t in poblacion}
+    return len(distintos) / len(poblacion)
+
+
+class ControladorConvergencia:
+    """
+    Decide, generación a generación, la tasa de mutación y si hay que
+    inyectar, reiniciar o detenerse. Se crea uno por corrida.
+
+    - tasa_mutacion: tasa base del algoritmo genético
+    - tasa_maxima: tope de la tasa adaptativa (por defecto, 4 veces la base, máx. 1)
+    - paciencia: generaciones sin mejora antes de subir la tasa e inyectar
+    - limite: generaciones sin mejora antes de reiniciar o detenerse (0 = nunca)
+    - al_limite: REINICIAR o DETENER
+    - diversidad_minima: por debajo de esta fracción de individuos distintos,
+      una población estancada recibe individuos nuevos
+    - fraccion_inyeccion: parte de la población (los peores) que se reemplaza al inyectar
+    - minimizar: True si un fitness menor es mejor (Sudoku), False si es mayor (horarios)
+    """
+
+    def __init__(self, tasa_mutacion, tasa_maxima=None, paciencia=20, limite=100, al_limite=REINICIAR,
+                 factor=1.5, diversidad_minima=0.3, fraccion_inyeccion=0.2, minimizar=True):
+        if al_limite not in (REINICIAR, DETENER):
+            raise ValueError(f"al_limite debe ser {REINICIAR!r} o {DETENER!r}")
+        self.tasa_base = tasa_mutacion
+        self.tasa_maxima = tasa_maxima if tasa_maxima is not None else min(1.0, 4 * tasa_mutacion)
+        self.tasa_mutacion = tasa_mutacion
+        self.paciencia = paciencia
+        self.limite = limite
+        self.al_limite = al_limite
+        self.factor = factor
+        self.diversidad_minima = diversidad_minima
+        self.fraccion_inyeccion = fraccion_inyeccion
+        self.minimizar = minimizar
+        self.mejor = None
+        self.estancadas = 0
+        self.inyecciones = 0
+        self.reinicios = 0
+        # (mejor, media, diversidad) por generación observada
+        self.historial = []
+
+    @property
+    def intensidad(self):
+        """Tasa actual relativa a la base (1.0 = sin ajuste)"""
+        return self.tasa_mutacion / self.tasa_base if self.tasa_base else 1.0
+
+    def _mejora(self, valor):
+        if self.mejor is None:
+            return True
+        return valor < self.mejor if self.minimizar else valor > self.mejor
+
+    def observar(self, fitnesses, diversidad_actual):
+        """Registra una generación; retorna None, INYECTAR, REINICIAR o DETENER"""
+        mejor = min(fitnesses) if self.minimizar else max(fitnesses)
+        self.historial.append((mejor, sum(fitnesses) / len(fitnesses), diversidad_actual))
+
+        if self._mejora(mejor):
+            self.mejor = mejor
+            self.estancadas = 0
+            self.tasa_mutacion = self.tasa_base
+            return None
+
+        self.estancadas += 1
+        if self.limite and self.estancadas >= self.limite:
+            self.estancadas = 0
+            self.tasa_mutacion = self.tasa_base
+            if self.al_limite == REINICIAR:
+                # La nueva población compite desde cero; el algoritmo guarda el mejor global
+                self.mejor = None
+                self.reinicios += 1
+            return self.al_limite
+
+        if self.estancadas % self.paciencia == 0:
+            self.tasa_mutacion = min(self.tasa_mutacion * self.factor, self.tasa_maxima)
+            self.inyecciones += 1
+            return INYECTAR
+        if diversidad_actual < self.diversidad_minima:
+            self.inyecciones += 1
+            return INYECTAR
+        return None
+
+    def estado(self):
+        """Variables que cambian durante la corrida, como dict serializable (para checkpoints)"""
+        return {"tasa_mutacion": self.tasa_mutacion, "mejor": self.mejor, "estancadas": self.estancadas,
+                "inyecciones": self.inyecciones, "reinicios": self.reinicios}
+
+    def restaurar(self, estado):
+        """Recupera las variables guardadas con estado()"""
+        for nombre, valor in estado.items():
+            setattr(self, nombre, valor)
+
+    def conservar(self, accion, tamaño, num_elite):
+        """Cuántos de los mejores individuos se conservan ante `accion`"""
+        if accion == REINICIAR:
+            return 0
+        return max(num_elite, tamaño - int(tamaño * self.fraccion_inyeccion))
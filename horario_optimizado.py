@@ -1,67 +1,169 @@
+import argparse
+import contextlib
+import inspect
+import itertools
+import json
+import os
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
 import skfuzzy as fuzz
-import copy
+
+import convergencia
+import seleccion
+from perfilado import SIN_PERFILAR, Perfilador
+
+# Columnas del genoma entero: una fila por materia (la materia es el índice de fila)
+PROF, AULA, DIA, INICIO, DUR = range(5)
+# Tipo de los genomas: cada individuo es un arreglo (n_materias, 5) de este tipo
+DTYPE_GENOMA = np.int16
+# Perfiles de incomodidad por defecto (ver Horarrio.md para el formato)
+PERFILES_POR_DEFECTO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfiles.json")
+def compilar_perfil(especificacion, x):
+    """Evalúa una forma difusa declarativa {"forma": "trapmf", "parametros": [...]}
+    sobre los índices de bloque `x`. "ultimo" en los parámetros es el último índice.
+    Las formas con un solo argumento además de x (trimf, trapmf, piecemf...)
+    reciben los parámetros como una lista; el resto, uno por argumento.
+    """
+    nombre = especificacion["forma"]
+    forma = getattr(fuzz, nombre, None)
+    if forma is None or not nombre.endswith("mf"):
+        raise ValueError(f"Forma difusa desconocida: {nombre!r}")
+    parametros = [x[-1] if p == "ultimo" else p for p in especificacion.get("parametros", [])]
+    con_lista = len(inspect.signature(forma).parameters) == 2
+    valores = forma(x, parametros) if con_lista else forma(x, *parametros)
+    return np.asarray(valores, dtype=np.float32)
+
+# Optimizador residente en cada proceso del pool de evaluación
+_motor_trabajador = None
+
+def _iniciar_trabajador(motor):
+    """Inicializador de cada proceso del pool: guarda la instancia una sola vez"""
+    global _motor_trabajador
+    _motor_trabajador = motor
+
+def _evaluar_en_trabajador(tramo):
+    """Evalúa un tramo de la población con la instancia residente del proceso"""
+    return _motor_trabajador.calcular_fitness_lote(tramo, con_choques=True)
+
+def _reparar_en_trabajador(genoma, semilla):
+    """Repara una copia del genoma con un generador sembrado por el proceso principal"""
+    _motor_trabajador.reparar_genoma(genoma, rng=random.Random(semilla))
+    return genoma
 
 class OptimizadorMaestro:
-    def __init__(self):
-        self.materias = [f"Materia_{i}" for i in range(1, 21)]
-        self.profesores = ["Dr. Gomez", "Ing. Perez", "Lic. Luis"]
-        self.aulas = ["Aula_101", "Aula_102"]
-        self.dias = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes"]
-        # Bloques horarios: 6 slots de 45 minutos empezando a las 07:00
-        inicio_min = 7 * 60  # 07:00 en minutos
-        paso = 45            # duración de cada bloque en minutos
-        cantidad = 6         # total de bloques
-        self.bloques = [
-            f"{(inicio_min + i * paso) // 60:02d}:{(inicio_min + i * paso) % 60:02d}"
-            for i in range(cantidad)
+    def __init__(self, materias=None, profesores=None, aulas=None, dias=None, bloques=6, calificaciones=None,
+                 perfiles=PERFILES_POR_DEFECTO):
+        """Sin argumentos crea la instancia de ejemplo (20 materias, 3 profesores, 2 aulas).
+        - bloques: cantidad de bloques de 45 min desde las 07:00, o lista de etiquetas "HH:MM"
+        - calificaciones: {materia: [profesores que pueden dictarla]}; por defecto, todos
+        - perfiles: ruta a un JSON de perfiles de incomodidad, o el dict ya cargado
+        """
+        self.materias = materias if materias is not None else [f"Materia_{i}" for i in range(1, 21)]
+        if profesores is None and calificaciones:
+            # Profesores en orden de aparición dentro de las calificaciones
+            profesores = list(dict.fromkeys(p for ps in calificaciones.values() for p in ps))
+        self.profesores = profesores if profesores is not None else ["Dr. Gomez", "Ing. Perez", "Lic. Luis"]
+        self.aulas = aulas if aulas is not None else ["Aula_101", "Aula_102"]
+        self.dias = dias if dias is not None else ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes"]
+        self.calificaciones = calificaciones or {}
+        if isinstance(bloques, int):
+            # Bloques horarios: slots de 45 minutos empezando a las 07:00
+            inicio_min = 7 * 60  # 07:00 en minutos
+            paso = 45            # duración de cada bloque en minutos
+            self.bloques = [
+                f"{(inicio_min + i * paso) // 60:02d}:{(inicio_min + i * paso) % 60:02d}"
+                for i in range(bloques)
+            ]
+        else:
+            self.bloques = list(bloques)
+        if isinstance(perfiles, str):
+            with open(perfiles, encoding="utf-8") as archivo:
+                perfiles = json.load(archivo)
+        self.perfiles = perfiles
+        self.compilar_indices()
+
+    def compilar_indices(self):
+        """Asigna IDs enteros a profesores, aulas, días y bloques, y precalcula
+        la matriz de penalización profesor x bloque usada por el fitness.
+        Volver a llamarlo si se cambian los perfiles de incomodidad (self.perfiles).
+        """
+        self.id_profesor = {p: k for k, p in enumerate(self.profesores)}
+        self.id_aula = {a: k for k, a in enumerate(self.aulas)}
+        self.id_dia = {d: k for k, d in enumerate(self.dias)}
+        self.id_bloque = {b: k for k, b in enumerate(self.bloques)}
+        # Profesores habilitados por materia (fila del genoma): lista de IDs y
+        # tabla rellenada (n_materias, max_calificados) para muestrear en bloque
+        todos = list(range(len(self.profesores)))
+        for m in self.materias:
+            if m in self.calificaciones and not self.calificaciones[m]:
+                raise ValueError(f"La sección {m!r} no tiene profesores habilitados")
+        self.profesores_calificados = [
+            [self.id_profesor[p] for p in self.calificaciones[m]] if m in self.calificaciones else todos
+            for m in self.materias
         ]
-        # Incomodidad por profesor (difusa), definida por índice de bloque
-        x = np.arange(0, cantidad, 1)
-        ultimo = cantidad - 1
-        self.incomodidad_profesor = {
-            # Prefiere temprano, le incomoda tarde
-            "Dr. Gomez": fuzz.trapmf(x, [3, 4, ultimo, ultimo]),
-            # Le incomoda muy temprano, prefiere más tarde
-            "Ing. Perez": fuzz.trapmf(x, [0, 0, 1, 2]),
-            # Prefiere evitar el medio, incomodidad centrada en horas intermedias
-            "Lic. Luis": fuzz.trapmf(x, [1, 2, 3, 4]),
-        }
+        self.n_calificados = np.array([len(c) for c in self.profesores_calificados])
+        self.tabla_calificados = np.zeros((len(self.materias), max(self.n_calificados, default=1)), dtype=DTYPE_GENOMA)
+        for i, c in enumerate(self.profesores_calificados):
+            self.tabla_calificados[i, :len(c)] = c
+        self.compilar_perfiles()
+        # Versión en listas de la tabla, para los bucles en Python puro
+        self.penalizacion = self.matriz_penalizacion.tolist()
+        # Celdas (aula|profesor, día, bloque) de las tablas planas de ocupación
+        self.celdas_aula = len(self.aulas) * len(self.dias) * len(self.bloques)
+        self.celdas_prof = len(self.profesores) * len(self.dias) * len(self.bloques)
 
-    def evaluar_comodidad_difusa(self, bloque):
-        """Evalúa incomodidad difusa en función del índice del bloque horario.
-        Soporta bloque como índice anterior (1..5) o etiqueta de hora ("HH:MM").
+    def compilar_perfiles(self):
+        """Compila self.perfiles en la tabla densa matriz_penalizacion
+        (profesor, día, bloque) de float32. Es el único lugar que llama a skfuzzy:
+        el fitness solo lee la tabla.
+        Formato: {"general": forma, "profesores": {nombre: forma con "dias" opcional}},
+        donde "dias" es {día: factor} o {día: forma} para variar el perfil por día.
         """
         x = np.arange(0, len(self.bloques), 1)
-        # Determinar índice del bloque
+        # Incomodidad alta en los últimos bloques, creciente desde el medio
+        self.incomodidad_general = compilar_perfil(
+            self.perfiles.get("general", {"forma": "trapmf", "parametros": [3, 4, "ultimo", "ultimo"]}), x)
+        especificaciones = self.perfiles.get("profesores", {})
+        self.incomodidad_profesor = {p: compilar_perfil(e, x) for p, e in especificaciones.items()}
+
+        tabla = np.empty((len(self.profesores), len(self.dias), len(self.bloques)), dtype=np.float32)
+        for k, profesor in enumerate(self.profesores):
+            # Si no hay perfil, usar incomodidad global como fallback
+            base = self.incomodidad_profesor.get(profesor, self.incomodidad_general)
+            tabla[k] = base
+            for dia, variacion in especificaciones.get(profesor, {}).get("dias", {}).items():
+                if isinstance(variacion, dict):
+                    tabla[k, self.id_dia[dia]] = compilar_perfil(variacion, x)
+                else:
+                    tabla[k, self.id_dia[dia]] = base * variacion
+        self.matriz_penalizacion = tabla
+
+    def _indice_bloque(self, bloque):
+        """Índice 0..N-1 de un bloque dado como índice 1..N o etiqueta "HH:MM"."""
         if isinstance(bloque, (int, np.integer)):
             # Compatibilidad: si viniera en 1..N, convertir a índice 0..N-1
-            idx = max(0, min(len(self.bloques) - 1, int(bloque) - 1))
-        else:
-            idx = self.bloques.index(bloque)
+            return max(0, min(len(self.bloques) - 1, int(bloque) - 1))
+        return self.bloques.index(bloque)
 
-        # Incomodidad alta en los últimos bloques, creciente desde el medio
-        ultimo = len(self.bloques) - 1
-        incomodo = fuzz.trapmf(x, [3, 4, ultimo, ultimo])
-        return float(fuzz.interp_membership(x, incomodo, idx))
+    def evaluar_comodidad_difusa(self, bloque):
+        """Evalúa incomodidad difusa en función del índice del bloque horario.
+        Soporta bloque como índice anterior (1..5) o etiqueta de hora ("HH:MM").
+        """
+        return float(self.incomodidad_general[self._indice_bloque(bloque)])
 
-    def evaluar_incomodidad_profesor(self, profesor, bloque):
+    def evaluar_incomodidad_profesor(self, profesor, bloque, dia=None):
         """Devuelve incomodidad específica del profesor para el bloque indicado.
-        Acepta bloque como índice 1..N o como etiqueta "HH:MM".
+        Acepta bloque como índice 1..N o como etiqueta "HH:MM". Con `dia`, incluye
+        la variación por día del perfil.
         """
-        # Resolver índice del bloque
-        if isinstance(bloque, (int, np.integer)):
-            idx = max(0, min(len(self.bloques) - 1, int(bloque) - 1))
-        else:
-            idx = self.bloques.index(bloque)
-        # Obtener incomodidad del profesor en ese índice
-        perfil = self.incomodidad_profesor.get(profesor)
-        if perfil is None:
-            # Si no hay perfil, usar incomodidad global como fallback
-            return self.evaluar_comodidad_difusa(bloque)
-        return float(perfil[idx])
+        idx = self._indice_bloque(bloque)
+        if dia is not None and profesor in self.id_profesor:
+            return float(self.matriz_penalizacion[self.id_profesor[profesor], self.id_dia[dia], idx])
+        # Si no hay perfil, usar incomodidad global como fallback
+        return float(self.incomodidad_profesor.get(profesor, self.incomodidad_general)[idx])
 
     def crear_individuo(self):
         individuos = []
@@ -71,13 +173,242 @@ class OptimizadorMaestro:
             bloques_sel = [self.bloques[start_idx + i] for i in range(dur)]
             individuos.append({
                 'materia': m,
-                'profesor': random.choice(self.profesores),
+                'profesor': random.choice(self.calificaciones.get(m, self.profesores)),
                 'aula': random.choice(self.aulas),
                 'dia': random.choice(self.dias),
                 'bloque': bloques_sel
             })
         return individuos
 
+    def codificar(self, individuo):
+        """Convierte un horario en formato dict al genoma entero
+        (una fila [profesor, aula, día, bloque_inicio, duración] por materia).
+        """
+        genoma = []
+        for c in individuo:
+            bloques = c['bloque'] if isinstance(c['bloque'], list) else [c['bloque']]
+            genoma.append([self.id_profesor[c['profesor']], self.id_aula[c['aula']],
+                           self.id_dia[c['dia']], self.id_bloque[bloques[0]], len(bloques)])
+        return genoma
+
+    def decodificar(self, genoma):
+        """Convierte un genoma entero al formato dict (para imprimir o exportar)."""
+        return [{
+            'materia': self.materias[i],
+            'profesor': self.profesores[g[PROF]],
+            'aula': self.aulas[g[AULA]],
+            'dia': self.dias[g[DIA]],
+            'bloque': self.bloques[g[INICIO]:g[INICIO] + g[DUR]],
+        } for i, g in enumerate(genoma)]
+
+    def crear_poblacion(self, tamaño_poblacion, rng=None):
+        """Población como un solo arreglo (P, n_materias, 5); cada individuo es una vista.
+        Se genera en bloque con el np.random.Generator `rng` (sin él, uno sembrado
+        desde `random`), respetando los profesores habilitados de cada materia.
+        """
+        if rng is None:
+            rng = np.random.default_rng(random.getrandbits(64))
+        forma = (tamaño_poblacion, len(self.materias))
+        poblacion = np.empty(forma + (5,), dtype=DTYPE_GENOMA)
+        dur = rng.integers(1, 3, forma)
+        poblacion[:, :, DUR] = dur
+        poblacion[:, :, INICIO] = (rng.random(forma) * (len(self.bloques) - dur + 1)).astype(np.intp)
+        poblacion[:, :, DIA] = rng.integers(0, len(self.dias), forma)
+        poblacion[:, :, AULA] = rng.integers(0, len(self.aulas), forma)
+        k = (rng.random(forma) * self.n_calificados).astype(np.intp)
+        poblacion[:, :, PROF] = self.tabla_calificados[np.arange(forma[1]), k]
+        return poblacion
+
+    def calcular_fitness_genoma(self, genoma):
+        """Mismo valor que calcular_fitness, sobre el genoma entero: la ocupación
+        se marca en tablas planas indexadas por (aula|profesor, día, bloque) y la
+        penalización blanda se lee de la matriz precalculada.
+        """
+        if isinstance(genoma, np.ndarray):
+            genoma = genoma.tolist()  # Recorrer enteros de Python es mucho más rápido
+        n_dias, n_bloques = len(self.dias), len(self.bloques)
+        ocup_aula = bytearray(self.celdas_aula)
+        ocup_prof = bytearray(self.celdas_prof)
+        choques = 0
+        penalizacion_blanda = 0
+
+        for prof, aula, dia, inicio, dur in genoma:
+            fila_pen = self.penalizacion[prof][dia]
+            base_aula = (aula * n_dias + dia) * n_bloques
+            base_prof = (prof * n_dias + dia) * n_bloques
+            for b in range(inicio, inicio + dur):
+                if ocup_aula[base_aula + b]:
+                    choques += 1
+                else:
+                    ocup_aula[base_aula + b] = 1
+                if ocup_prof[base_prof + b]:
+                    choques += 1
+                else:
+                    ocup_prof[base_prof + b] = 1
+                penalizacion_blanda += fila_pen[b] * 0.1
+
+        return 1 / (1 + (choques * 5000) + penalizacion_blanda)
+
+    def calcular_fitness_lote(self, poblacion, tamaño_bloque=None, con_choques=False):
+        """Fitness de toda la población (P, n_materias, 5) en una pasada de NumPy.
+        Suma la ocupación en tensores (P, aulas, días, bloques) y (P, profesores,
+        días, bloques), cuenta choques como max(conteo - 1, 0) y toma la
+        penalización blanda de la matriz precalculada. Procesa la población por
+        tramos de `tamaño_bloque` individuos para acotar la memoria (por defecto,
+        unos 4M de celdas de ocupación por tramo).
+        Con `con_choques` retorna (fitness, choques) con los choques por individuo.
+        """
+        P = len(poblacion)
+        if tamaño_bloque is None:
+            tamaño_bloque = max(1, (1 << 22) // max(self.celdas_aula, self.celdas_prof, 1))
+        resultado = np.empty(P)
+        choques = np.empty(P, dtype=np.int64)
+        for inicio in range(0, P, tamaño_bloque):
+            tramo = poblacion[inicio:inicio + tamaño_bloque]
+            fin = inicio + len(tramo)
+            resultado[inicio:fin], choques[inicio:fin] = self._fitness_tramo(tramo)
+        return (resultado, choques) if con_choques else resultado
+
+    def _fitness_tramo(self, poblacion):
+        P, n = poblacion.shape[:2]
+        n_dias, n_bloques = len(self.dias), len(self.bloques)
+        g = poblacion.astype(np.intp)
+        prof, aula, dia, inicio, dur = (g[:, :, k] for k in range(5))
+        individuo = np.arange(P)[:, None]
+
+        choques = np.zeros(P, dtype=np.int64)
+        penalizacion_blanda = np.zeros(P)
+        celdas = []
+        # Desplegar cada clase en sus bloques: desplazamiento 0, 1, ... < duración
+        for d in range(int(dur.max()) if dur.size else 0):
+            activo = dur > d
+            b = np.where(activo, inicio + d, 0)
+            celdas.append((activo, b))
+            penalizacion_blanda += np.where(activo, self.matriz_penalizacion[prof, dia, b], 0).sum(axis=1, dtype=np.float64)
+
+        for recurso, n_recursos in ((aula, len(self.aulas)), (prof, len(self.profesores))):
+            base = ((individuo * n_recursos + recurso) * n_dias + dia) * n_bloques
+            indices = np.concatenate([(base + b)[activo] for activo, b in celdas])
+            ocupacion = np.bincount(indices, minlength=P * n_recursos * n_dias * n_bloques)
+            choques += np.maximum(ocupacion.reshape(P, -1) - 1, 0).sum(axis=1)
+
+        return 1 / (1 + (choques * 5000) + penalizacion_blanda * 0.1), choques
+
+    def verificar_fitness_lote(self, tamaño=500):
+        """Comprueba que calcular_fitness_lote coincide con calcular_fitness (referencia)
+        y que cada sección de la población recibe uno de sus profesores habilitados."""
+        poblacion = self.crear_poblacion(tamaño)
+        for i, calificados in enumerate(self.profesores_calificados):
+            assert np.isin(poblacion[:, i, PROF], calificados).all(), \
+                f"La sección {self.materias[i]!r} recibió un profesor no habilitado"
+        lote = self.calcular_fitness_lote(poblacion)
+        referencia = np.array([self.calcular_fitness(self.decodificar(g)) for g in poblacion])
+        assert np.allclose(lote, referencia, rtol=1e-12, atol=0), "El fitness por lotes difiere de la referencia"
+        return True
+
+    def verificar_genoma(self, tamaño=2000):
+        """Comprueba sobre horarios al azar que codificar invierte a decodificar y
+        que analizar_genoma marca los mismos conflictos que analizar_individuo."""
+        for genoma in self.crear_poblacion(tamaño):
+            individuo = self.decodificar(genoma)
+            assert self.codificar(individuo) == genoma.tolist(), "codificar no invierte a decodificar"
+            assert self.analizar_genoma(genoma) == self.analizar_individuo(individuo), \
+                "analizar_genoma difiere de analizar_individuo"
+        return True
+
+    def analizar_genoma(self, genoma):
+        """Mismo resultado que analizar_individuo, sobre el genoma entero."""
+        if isinstance(genoma, np.ndarray):
+            genoma = genoma.tolist()
+        n_dias, n_bloques = len(self.dias), len(self.bloques)
+        conflictos = [False] * len(genoma)
+        usos_aula = {}
+        usos_prof = {}
+        for i, (prof, aula, dia, inicio, dur) in enumerate(genoma):
+            for b in range(inicio, inicio + dur):
+                for usos, clave in ((usos_aula, (aula * n_dias + dia) * n_bloques + b),
+                                    (usos_prof, (prof * n_dias + dia) * n_bloques + b)):
+                    if clave in usos:
+                        conflictos[i] = True
+                        conflictos[usos[clave]] = True
+                    else:
+                        usos[clave] = i
+        return conflictos
+
+    def reparar_genoma(self, genoma, intentos=20, rng=random):
+        """Búsqueda local dirigida por conflictos (paso memético), en el lugar.
+        Retira del índice de ocupación cada clase en choque y prueba hasta
+        `intentos` huecos (día, bloque) donde uno de sus profesores habilitados
+        esté libre; el aula se toma del índice de aulas libres de esa celda.
+        Solo acepta movimientos que dejan la clase sin choques, así que nunca
+        empeora los choques. `rng` es el generador de números aleatorios
+        (por defecto, el módulo random). Retorna cuántas clases reubicó.
+        """
+        filas = genoma.tolist()
+        n_dias, n_bloques = len(self.dias), len(self.bloques)
+        por_aula = n_dias * n_bloques
+        ocup_aula = [0] * self.celdas_aula
+        ocup_prof = [0] * self.celdas_prof
+        for prof, aula, dia, inicio, dur in filas:
+            base_aula = (aula * n_dias + dia) * n_bloques
+            base_prof = (prof * n_dias + dia) * n_bloques
+            for b in range(inicio, inicio + dur):
+                ocup_aula[base_aula + b] += 1
+                ocup_prof[base_prof + b] += 1
+        # Índice de ocupación: aulas libres por celda (día, bloque)
+        libres = [{a for a in range(len(self.aulas)) if not ocup_aula[a * por_aula + c]} for c in range(por_aula)]
+
+        def marcar(fila, delta):
+            prof, aula, dia, inicio, dur = fila
+            base_aula = (aula * n_dias + dia) * n_bloques
+            base_prof = (prof * n_dias + dia) * n_bloques
+            for b in range(inicio, inicio + dur):
+                ocup_aula[base_aula + b] += delta
+                ocup_prof[base_prof + b] += delta
+                if ocup_aula[base_aula + b] == 0:
+                    libres[dia * n_bloques + b].add(aula)
+                else:
+                    libres[dia * n_bloques + b].discard(aula)
+
+        def en_choque(fila, limite):
+            prof, aula, dia, inicio, dur = fila
+            base_aula = (aula * n_dias + dia) * n_bloques
+            base_prof = (prof * n_dias + dia) * n_bloques
+            return any(ocup_aula[base_aula + b] > limite or ocup_prof[base_prof + b] > limite
+                       for b in range(inicio, inicio + dur))
+
+        def buscar_hueco(calificados, dur):
+            for _ in range(intentos):
+                dia = rng.randrange(n_dias)
+                inicio = rng.randint(0, n_bloques - dur)
+                prof = rng.choice(calificados)
+                base_prof = (prof * n_dias + dia) * n_bloques
+                if any(ocup_prof[base_prof + b] for b in range(inicio, inicio + dur)):
+                    continue
+                for aula in itertools.islice(libres[dia * n_bloques + inicio], 16):
+                    base_aula = (aula * n_dias + dia) * n_bloques
+                    if not any(ocup_aula[base_aula + b] for b in range(inicio + 1, inicio + dur)):
+                        return [prof, aula, dia, inicio, dur]
+            return None
+
+        pendientes = [i for i, fila in enumerate(filas) if en_choque(fila, 1)]
+        rng.shuffle(pendientes)
+        reubicadas = 0
+        for i in pendientes:
+            fila = filas[i]
+            if not en_choque(fila, 1):
+                continue  # Ya se resolvió al mover la otra clase del choque
+            marcar(fila, -1)
+            nueva = buscar_hueco(self.profesores_calificados[i], fila[DUR])
+            if nueva is None:
+                marcar(fila, 1)
+                continue
+            marcar(nueva, 1)
+            filas[i] = nueva
+            genoma[i] = nueva
+            reubicadas += 1
+        return reubicadas
+
     def analizar_individuo(self, individuo):
         """Detecta qué filas específicas tienen conflicto."""
         conflictos = [False] * len(individuo)
@@ -122,7 +453,7 @@ class OptimizadorMaestro:
                 else:
                     usos_prof.add(p)
                 # Penalización blanda específica del profesor
-                penalizacion_blanda += self.evaluar_incomodidad_profesor(c['profesor'], b) * 0.1
+                penalizacion_blanda += self.evaluar_incomodidad_profesor(c['profesor'], b, c['dia']) * 0.1
 
         return 1 / (1 + (choques * 5000) + penalizacion_blanda)
 
@@ -159,50 +490,408 @@ class OptimizadorMaestro:
         print("-" * len(header))
         print(f"Fitness Resultante: {self.calcular_fitness(individuo):.8f}\n")
 
-    def ejecutar(self):
+    def exportar_csv(self, individuo, ruta):
+        """Guarda un horario en formato dict como CSV (bloques separados por coma)."""
+        filas = [dict(c, bloque=", ".join(c['bloque'])) for c in individuo]
+        pd.DataFrame(filas).to_csv(ruta, index=False)
 
-        poblacion = [self.crear_individuo() for _ in range(100)]
-        horario_inicial = copy.deepcopy(poblacion[0])
-        self.imprimir_resultado(horario_inicial, "HORARIO INICIAL")
+    @classmethod
+    def desde_json(cls, ruta):
+        """Carga una instancia desde JSON:
+        {"materias": ["Mat_1", {"nombre": "Mat_2", "profesores": ["A", "B"]}, ...],
+         "profesores": [...], "aulas": [...], "dias": [...], "bloques": 6 | ["07:00", ...],
+         "perfiles": {...} | "perfiles.json"}
+        Todas las claves salvo "materias" son opcionales; una ruta de perfiles es
+        relativa al archivo de la instancia.
+        """
+        with open(ruta, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        materias, calificaciones = [], {}
+        for m in datos["materias"]:
+            if isinstance(m, str):
+                materias.append(m)
+            else:
+                materias.append(m["nombre"])
+                if "profesores" in m:
+                    calificaciones[m["nombre"]] = m["profesores"]
+        perfiles = datos.get("perfiles", PERFILES_POR_DEFECTO)
+        if isinstance(perfiles, str):
+            perfiles = os.path.join(os.path.dirname(os.path.abspath(ruta)), perfiles)
+        return cls(materias, datos.get("profesores"), datos.get("aulas"), datos.get("dias"),
+                   datos.get("bloques", 6), calificaciones or None, perfiles)
+
+    @classmethod
+    def desde_csv(cls, ruta_secciones, ruta_aulas=None, separador="|"):
+        """Carga una instancia desde CSV.
+        - secciones: columna "materia" y opcional "profesores" (habilitados, separados por
+          `separador`); una celda vacía habilita a cualquier profesor
+        - aulas: columna "aula"
+        """
+        secciones = pd.read_csv(ruta_secciones, dtype=str)
+        materias = secciones["materia"].tolist()
+        calificaciones = None
+        if "profesores" in secciones:
+            calificaciones = {}
+            for m, ps in zip(materias, secciones["profesores"].fillna("")):
+                habilitados = [p.strip() for p in ps.split(separador) if p.strip()]
+                if habilitados:
+                    calificaciones[m] = habilitados
+        aulas = pd.read_csv(ruta_aulas, dtype=str)["aula"].tolist() if ruta_aulas else None
+        return cls(materias, aulas=aulas, calificaciones=calificaciones)
+
+    def evaluar_poblacion(self, poblacion, pool=None, procesos=1):
+        """(fitness, choques) de la población; con `pool`, repartida en `procesos` tramos.
+        La evaluación no usa números aleatorios, así que el resultado es idéntico
+        en serie y en paralelo.
+        """
+        if pool is None or procesos <= 1:
+            return self.calcular_fitness_lote(poblacion, con_choques=True)
+        partes = list(pool.map(_evaluar_en_trabajador, np.array_split(poblacion, procesos)))
+        return np.concatenate([f for f, _ in partes]), np.concatenate([c for _, c in partes])
+
+    def reparar_elite(self, poblacion, cantidad, pool=None, rng=None):
+        """Aplica reparar_genoma a los `cantidad` primeros individuos, en el lugar.
+        Cada uno usa su propio random.Random con una semilla sacada en el proceso
+        principal del np.random.Generator `rng` (o de `random` si falta), así que
+        serie y paralelo dan el mismo resultado.
+        """
+        cantidad = min(cantidad, len(poblacion))
+        if rng is None:
+            semillas = [random.getrandbits(64) for _ in range(cantidad)]
+        else:
+            semillas = rng.integers(0, 2**63, cantidad).tolist()
+        if pool is None:
+            for k, semilla in enumerate(semillas):
+                self.reparar_genoma(poblacion[k], rng=random.Random(semilla))
+            return
+        for k, genoma in enumerate(pool.map(_reparar_en_trabajador, poblacion[:cantidad], semillas)):
+            poblacion[k] = genoma
+
+    def ejecutar(self, generaciones=501, tamaño_poblacion=100, mostrar_horarios=True, reparar=5,
+                 hasta_factible=False, procesos=1, controlador=None, callback=None, checkpoint=None,
+                 intervalo_checkpoint=50, reanudar=False, perfilador=None, semilla=None):
+        """Corre el algoritmo genético; retorna (mejor_individuo, historial de mejor fitness).
+        Internamente la población es un arreglo (P, n_materias, 5): cruce y mutación
+        escriben por rebanadas en un arreglo preasignado, sin deepcopy.
+        - reparar: cuántos de la élite pasan cada generación por reparar_genoma (0 = sin paso memético)
+        - hasta_factible: detenerse en cuanto el mejor no tenga choques
+        - procesos: >1 evalúa el fitness y repara la élite en un pool de procesos
+          que recibe la instancia una sola vez al arrancar; 1 = en serie (para depurar)
+        - controlador: convergencia.ControladorConvergencia(0.3, minimizar=False)
+          para adaptar la probabilidad de mutación y renovar o detener la
+          población cuando se estanca
+        - callback: función que recibe las estadísticas de cada generación (ver iterar)
+        - checkpoint: archivo .npz donde se guarda el estado cada `intervalo_checkpoint`
+          generaciones y al terminar; con `reanudar`, la corrida continúa desde él
+        - perfilador: perfilado.Perfilador que acumula tiempo y llamadas por fase
+          (inicio, evaluacion, seleccion, copia, reparacion, cruce, mutacion,
+          convergencia, registro)
+        - semilla: semilla (o np.random.Generator) del generador de la corrida
+        Toda la aleatoriedad sale de ese generador, en el proceso principal y en
+        bloque por generación: con la misma `semilla`, la corrida es idéntica con
+        cualquier cantidad de procesos, y una corrida reanudada sigue igual que
+        si no se hubiera interrumpido.
+        El mejor se devuelve en formato dict.
+        """
+        perfilador = perfilador or SIN_PERFILAR
+        with perfilador.fase("inicio"):
+            estado = self._estado_inicial(tamaño_poblacion, checkpoint if reanudar else None, controlador, semilla)
+        if mostrar_horarios:
+            self.imprimir_resultado(self.decodificar(estado['poblacion'][0]), "HORARIO INICIAL")
 
         print("\nOptimización en progreso...")
-        
-        for gen in range(501): # Más generaciones para 20 materias
-            poblacion = sorted(poblacion, key=lambda x: self.calcular_fitness(x), reverse=True)
-            mejor_f = self.calcular_fitness(poblacion[0])
-            
-            if gen % 100 == 0:
-                print(f"Gen {gen} | Fitness: {mejor_f:.6f}")
+        for estadisticas in self._iterar(estado, generaciones, reparar, hasta_factible, procesos, controlador,
+                                         checkpoint, intervalo_checkpoint, perfilador):
+            if callback is not None:
+                callback(estadisticas)
+
+        mejor = self.decodificar(estado['mejor_genoma'])
+        if mostrar_horarios:
+            self.imprimir_resultado(mejor, "HORARIO FINAL OPTIMIZADO")
+        return mejor, estado['historial']
+
+    def iterar(self, generaciones=501, tamaño_poblacion=100, reparar=5, hasta_factible=False, procesos=1,
+               controlador=None, checkpoint=None, intervalo_checkpoint=50, reanudar=False, perfilador=None,
+               semilla=None):
+        """Generador: mismos parámetros que ejecutar(), pero produce un dict por generación
+        en cuanto termina, con 'generacion', 'mejor' (mejor fitness global),
+        'mejor_generacion', 'media', 'choques' (del mejor de la generación),
+        'diversidad', 'tasa_mutacion' y 'segundos' desde el inicio.
+        El mejor genoma queda en self.mejor_genoma. Con `perfilador`, la fase
+        registro incluye el tiempo que el consumidor retiene cada dict.
+        """
+        perfilador = perfilador or SIN_PERFILAR
+        with perfilador.fase("inicio"):
+            estado = self._estado_inicial(tamaño_poblacion, checkpoint if reanudar else None, controlador, semilla)
+        yield from self._iterar(estado, generaciones, reparar, hasta_factible, procesos, controlador,
+                                checkpoint, intervalo_checkpoint, perfilador)
+
+    def _estado_inicial(self, tamaño_poblacion, checkpoint=None, controlador=None, semilla=None):
+        """Estado de una corrida nueva, o el guardado en `checkpoint` si el archivo existe
+        (en ese caso el generador guardado reemplaza a `semilla`)."""
+        if checkpoint is not None and os.path.exists(checkpoint):
+            estado = self.cargar_checkpoint(checkpoint, controlador)
+            print(f"↻ Reanudando desde {checkpoint} (Gen {estado['generacion']})")
+            return estado
+        rng = np.random.default_rng(semilla)
+        return {
+            'rng': rng,
+            'poblacion': self.crear_poblacion(tamaño_poblacion, rng),
+            'generacion': 0,
+            'historial': [],
+            'mejor_genoma': None,
+            'mejor_f': -1.0,  # Mejor global, por si hay reinicios
+            'tasa_mutacion': 0.3,
+        }
+
+    def guardar_checkpoint(self, ruta, estado, controlador=None):
+        """Guarda población, historial, mejor global y estado del generador en un .npz.
+        Se escribe en un archivo temporal y se renombra, así que un corte a mitad
+        de la escritura no deja un checkpoint roto.
+        """
+        temporal = ruta + ".tmp"
+        with open(temporal, "wb") as archivo:
+            np.savez(archivo,
+                     poblacion=estado['poblacion'],
+                     generacion=estado['generacion'],
+                     historial=np.asarray(estado['historial'], dtype=np.float64),
+                     mejor_genoma=estado['mejor_genoma'],
+                     mejor_f=estado['mejor_f'],
+                     tasa_mutacion=estado['tasa_mutacion'],
+                     rng=json.dumps(estado['rng'].bit_generator.state),
+                     controlador=json.dumps(controlador.estado() if controlador is not None else None))
+        os.replace(temporal, ruta)
+
+    def cargar_checkpoint(self, ruta, controlador=None):
+        """Lee un checkpoint de guardar_checkpoint, restaura el generador (y el controlador) y retorna el estado."""
+        with np.load(ruta) as datos:
+            poblacion = datos['poblacion']
+            if poblacion.shape[1] != len(self.materias):
+                raise ValueError(f"El checkpoint tiene {poblacion.shape[1]} materias; la instancia, {len(self.materias)}")
+            rng = np.random.default_rng()
+            rng.bit_generator.state = json.loads(str(datos['rng']))
+            guardado = json.loads(str(datos['controlador']))
+            if controlador is not None and guardado is not None:
+                controlador.restaurar(guardado)
+            return {
+                'rng': rng,
+                'poblacion': poblacion,
+                'generacion': int(datos['generacion']),
+                'historial': datos['historial'].tolist(),
+                'mejor_genoma': datos['mejor_genoma'],
+                'mejor_f': float(datos['mejor_f']),
+                'tasa_mutacion': float(datos['tasa_mutacion']),
+            }
+
+    def _iterar(self, estado, generaciones, reparar, hasta_factible, procesos, controlador, checkpoint,
+                intervalo_checkpoint, perfilador=SIN_PERFILAR):
+        """Bucle generacional de ejecutar() e iterar(); actualiza `estado` y produce estadísticas."""
+        pool = None
+        if procesos > 1:
+            pool = ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador, initargs=(self,))
+        with pool or contextlib.nullcontext():
+            yield from self._evolucionar(estado, generaciones, reparar, hasta_factible, pool, procesos, controlador,
+                                         checkpoint, intervalo_checkpoint, perfilador)
+        if checkpoint is not None and estado['mejor_genoma'] is not None:
+            with perfilador.fase("registro"):
+                self.guardar_checkpoint(checkpoint, estado, controlador)
+
+    def _evolucionar(self, estado, generaciones, reparar, hasta_factible, pool, procesos, controlador, checkpoint,
+                     intervalo_checkpoint, perfilador=SIN_PERFILAR):
+        """Generaciones desde estado['generacion'] hasta `generaciones` (o hasta parar antes)."""
+        poblacion, rng = estado['poblacion'], estado['rng']
+        self.mejor_genoma = estado['mejor_genoma']
+        tamaño_poblacion, n_materias = poblacion.shape[:2]
+        elite = min(20, tamaño_poblacion)
+        tasa_mutacion = estado['tasa_mutacion']
+        inicio = time.perf_counter()
+        for gen in range(estado['generacion'], generaciones): # Más generaciones para 20 materias
+            with perfilador.fase("evaluacion"):
+                fitness, choques = self.evaluar_poblacion(poblacion, pool, procesos)
+            with perfilador.fase("convergencia"):
+                diversidad = convergencia.diversidad(poblacion)
+            with perfilador.fase("seleccion"):
+                # Solo se ordenan los mejores que se usan (orden parcial), no toda la población
+                orden = seleccion.mejores(fitness, max(elite, reparar), minimizar=False)
+            with perfilador.fase("copia"):
+                poblacion = poblacion[orden]
+                if fitness[orden[0]] > estado['mejor_f']:
+                    estado['mejor_genoma'], estado['mejor_f'] = poblacion[0].copy(), float(fitness[orden[0]])
+                    self.mejor_genoma = estado['mejor_genoma']
+            mejor_f = estado['mejor_f']
+            estado['historial'].append(mejor_f)
+            with perfilador.fase("registro"):
+                yield {
+                    'generacion': gen,
+                    'mejor': mejor_f,
+                    'mejor_generacion': float(fitness[orden[0]]),
+                    'media': float(fitness.mean()),
+                    'choques': int(choques[orden[0]]),
+                    'diversidad': diversidad,
+                    'tasa_mutacion': tasa_mutacion,
+                    'segundos': time.perf_counter() - inicio,
+                }
+
+                if gen % 100 == 0:
+                    print(f"Gen {gen} | Fitness: {mejor_f:.6f} | Choques: {choques[orden[0]]}")
 
             if mejor_f > 0.99:
                 print(f"¡Éxito en Gen {gen}!")
                 break
+            if hasta_factible and choques[orden[0]] == 0:
+                print(f"¡Horario sin choques en Gen {gen}!")
+                break
+
+            # Control de convergencia: tasa adaptativa, inyección, reinicio o parada
+            accion = None
+            if controlador is not None:
+                with perfilador.fase("convergencia"):
+                    accion = controlador.observar(fitness.tolist(), diversidad)
+                tasa_mutacion = controlador.tasa_mutacion
+                if accion == convergencia.DETENER:
+                    print(f"Estancado: se detiene en Gen {gen}")
+                    break
+
+            # Paso memético: reubicar las clases en choque de los mejores
+            with perfilador.fase("reparacion"):
+                self.reparar_elite(poblacion, reparar, pool, rng)
             
-            nueva_gen = [copy.deepcopy(poblacion[0])] # Elitismo
-            
-            while len(nueva_gen) < 100:
-                # Selección
-                p1, p2 = random.sample(poblacion[:20], 2)
-                
-                # Crossover
-                punto = random.randint(1, len(p1)-1)
-                hijo = copy.deepcopy(p1[:punto] + p2[punto:])
-                
-                # Mutación más variada
-                if random.random() < 0.3:
-                    m = random.choice(hijo)
-                    m['dia'] = random.choice(self.dias)
-                    # Reasignar 1 o 2 bloques consecutivos
-                    dur = random.choice([1, 2])
-                    start_idx = random.randint(0, len(self.bloques) - dur)
-                    m['bloque'] = [self.bloques[start_idx + i] for i in range(dur)]
-                    m['aula'] = random.choice(self.aulas)
-                
-                nueva_gen.append(hijo)
+            with perfilador.fase("copia"):
+                nueva_gen = np.empty((tamaño_poblacion,) + poblacion.shape[1:], dtype=poblacion.dtype)
+                nueva_gen[0] = poblacion[0] # Elitismo
+            hijos = nueva_gen[1:]
+            n_hijos = len(hijos)
+
+            # Selección: dos padres distintos de la élite por hijo, sorteados en bloque
+            with perfilador.fase("seleccion"):
+                i1 = rng.integers(0, elite, n_hijos)
+                i2 = rng.integers(0, elite - 1, n_hijos)
+                i2 += i2 >= i1
+
+            # Crossover de un punto: cada hijo se escribe directamente en su fila.
+            # Los puntos se sortean en bloque; copiar dos tramos contiguos por hijo
+            # es más rápido que reunir todas las filas con un índice avanzado
+            with perfilador.fase("cruce"):
+                puntos = rng.integers(1, n_materias, n_hijos)
+                for hijo, p1, p2, punto in zip(hijos, i1.tolist(), i2.tolist(), puntos.tolist()):
+                    hijo[:punto] = poblacion[p1, :punto]
+                    hijo[punto:] = poblacion[p2, punto:]
+
+            # Mutación más variada: a lo sumo una materia por hijo
+            with perfilador.fase("mutacion"):
+                mutados = 1 + np.flatnonzero(rng.random(n_hijos) < tasa_mutacion)
+                n_mut = len(mutados)
+                materia = rng.integers(0, n_materias, n_mut)
+                # Reasignar 1 o 2 bloques consecutivos
+                dur = rng.integers(1, 3, n_mut)
+                nueva_gen[mutados, materia, DIA] = rng.integers(0, len(self.dias), n_mut)
+                nueva_gen[mutados, materia, INICIO] = (rng.random(n_mut) * (len(self.bloques) - dur + 1)).astype(np.intp)
+                nueva_gen[mutados, materia, DUR] = dur
+                nueva_gen[mutados, materia, AULA] = rng.integers(0, len(self.aulas), n_mut)
+            if accion is not None:
+                # Los últimos hijos se reemplazan por individuos nuevos (todos, al reiniciar)
+                with perfilador.fase("convergencia"):
+                    conservar = controlador.conservar(accion, tamaño_poblacion, 1)
+                    nueva_gen[conservar:] = self.crear_poblacion(tamaño_poblacion - conservar, rng)
             poblacion = nueva_gen
 
-        self.imprimir_resultado(poblacion[0], "HORARIO FINAL OPTIMIZADO")
+            # Estado listo para la generación siguiente
+            estado['poblacion'], estado['generacion'], estado['tasa_mutacion'] = poblacion, gen + 1, tasa_mutacion
+            if checkpoint is not None and (gen + 1) % intervalo_checkpoint == 0:
+                with perfilador.fase("registro"):
+                    self.guardar_checkpoint(checkpoint, estado, controlador)
+
+
+def verificar_csv():
+    """Carga un CSV de secciones con una celda de profesores vacía (cualquier
+    profesor) y comprueba que una lista vacía explícita se rechaza."""
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "secciones.csv")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write("materia,profesores\nMat_1,A|B\nMat_2,\nMat_3,C\n")
+        motor = OptimizadorMaestro.desde_csv(ruta)
+    assert motor.profesores_calificados[1] == list(range(len(motor.profesores)))
+    motor.verificar_fitness_lote(tamaño=50)
+    try:
+        OptimizadorMaestro(["Mat_1"], calificaciones={"Mat_1": []})
+    except ValueError:
+        return True
+    raise AssertionError("Una sección sin profesores habilitados debería rechazarse")
+
+
+def generar_instancia(n_secciones, semilla=0, profesores_por_seccion=3, bloques=6):
+    """Instancia sintética de tamaño controlable.
+    Dimensiona profesores (~6 secciones cada uno) y aulas (con holgura sobre la
+    demanda media de 1.5 bloques por sección) para que exista un horario sin
+    choques, y habilita `profesores_por_seccion` profesores al azar por sección.
+    """
+    rng = random.Random(semilla)
+    n_profesores = max(3, -(-n_secciones // 6))
+    n_aulas = max(2, -(-n_secciones * 2 // (5 * bloques)))
+    profesores = [f"Prof_{k}" for k in range(1, n_profesores + 1)]
+    aulas = [f"Aula_{k}" for k in range(1, n_aulas + 1)]
+    materias = [f"Seccion_{k}" for k in range(1, n_secciones + 1)]
+    calificaciones = {m: rng.sample(profesores, min(profesores_por_seccion, n_profesores)) for m in materias}
+    return OptimizadorMaestro(materias, profesores, aulas, None, bloques, calificaciones)
 
 if __name__ == "__main__":
-    motor = OptimizadorMaestro()
-    motor.ejecutar()
+    parser = argparse.ArgumentParser(description="Optimizador de horarios con algoritmo genético")
+    parser.add_argument("--json", help="instancia en JSON")
+    parser.add_argument("--csv", help="secciones en CSV (columnas materia, profesores)")
+    parser.add_argument("--aulas", help="aulas en CSV (columna aula), junto con --csv")
+    parser.add_argument("--sintetica", type=int, help="generar una instancia sintética con N secciones")
+    parser.add_argument("--generaciones", type=int, default=501)
+    parser.add_argument("--perfiles", help="JSON de perfiles de incomodidad (por defecto, perfiles.json)")
+    parser.add_argument("--procesos", type=int, default=1, help="procesos para evaluar el fitness (1 = en serie)")
+    parser.add_argument("--checkpoint", help="archivo .npz donde guardar el estado periódicamente")
+    parser.add_argument("--intervalo-checkpoint", type=int, default=50, help="generaciones entre checkpoints")
+    parser.add_argument("--reanudar", action="store_true", help="continuar desde --checkpoint si existe")
+    parser.add_argument("--progreso", help="archivo JSONL con las estadísticas de cada generación (para seguirlo con tail -f)")
+    parser.add_argument("--perfilar", nargs="?", const="", metavar="JSON",
+                        help="mostrar el tiempo por fase al terminar (y guardarlo en JSON si se indica archivo)")
+    parser.add_argument("--semilla", type=int, help="semilla del generador aleatorio (misma semilla, misma corrida)")
+    parser.add_argument("--verificar", action="store_true",
+                        help="comprobar el fitness por lotes sobre la instancia y la carga de CSV, y salir")
+    args = parser.parse_args()
+
+    if args.json:
+        motor = OptimizadorMaestro.desde_json(args.json)
+    elif args.csv:
+        motor = OptimizadorMaestro.desde_csv(args.csv, args.aulas)
+    elif args.sintetica:
+        motor = generar_instancia(args.sintetica)
+    else:
+        motor = OptimizadorMaestro()
+    if args.perfiles:
+        with open(args.perfiles, encoding="utf-8") as archivo:
+            motor.perfiles = json.load(archivo)
+        motor.compilar_indices()
+    if args.verificar:
+        # Muestra de verificación acotada para instancias grandes
+        motor.verificar_fitness_lote(tamaño=max(10, 10000 // len(motor.materias)))
+        print("✓ Fitness por lotes idéntico a calcular_fitness")
+        motor.verificar_genoma(tamaño=max(10, 40000 // len(motor.materias)))
+        print("✓ Genoma entero equivalente al formato dict (codificar y conflictos)")
+        verificar_csv()
+        print("✓ CSV: celdas de profesores vacías habilitan a cualquiera")
+        raise SystemExit
+
+    with open(args.progreso, "a") if args.progreso else contextlib.nullcontext() as progreso:
+        def registrar(estadisticas):
+            progreso.write(json.dumps(estadisticas) + "\n")
+            progreso.flush()
+
+        perfilador = Perfilador() if args.perfilar is not None else None
+        motor.ejecutar(generaciones=args.generaciones, procesos=args.procesos,
+                       callback=registrar if progreso else None, checkpoint=args.checkpoint,
+                       intervalo_checkpoint=args.intervalo_checkpoint, reanudar=args.reanudar,
+                       perfilador=perfilador, semilla=args.semilla)
+
+    if perfilador is not None:
+        print("\n⏱️ Tiempo por fase")
+        print(perfilador.tabla())
+        if args.perfilar:
+            perfilador.a_json(args.perfilar)
+
@@ -0,0 +1,131 @@
+"""
+Instrumentación opcional por fases de los algoritmos genéticos.
+
+Un Perfilador acumula el tiempo y la cantidad de llamadas de cada fase del
+bucle (inicio, evaluacion, seleccion, cruce, mutacion, copia, registro, ...):
+
+    perfilador = Perfilador()
+    with perfilador.fase("evaluacion"):
+        ...
+    print(perfilador.tabla())
+
+Los algoritmos reciben `perfilador=None` y usan SIN_PERFILAR, cuyo `fase()`
+devuelve siempre el mismo contexto vacío: desactivado, el costo es una
+llamada a método por fase.
+
+Histograma cuenta observaciones (latencias, tamaños) en tramos fijos, para
+servicios de larga duración donde guardar cada medición no escala.
+"""
+import bisect
+import contextlib
+import json
+import time
+
+
+class _Fase:
+    """Contexto que suma la duración de un bloque a su fase"""
+    __slots__ = ("perfilador", "nombre", "inicio")
+
+    def __init__(self, perfilador, nombre):
+        self.perfilador = perfilador
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, *excepcion):
+        self.perfilador.registrar(self.nombre, time.perf_counter() - self.inicio)
+
+
+class Perfilador:
+    """Tiempo acumulado y llamadas por fase de una corrida"""
+
+    def __init__(self):
+        self.segundos = {}
+        self.llamadas = {}
+        self.inicio = time.perf_counter()
+
+    def fase(self, nombre):
+        """Contexto que mide un bloque como parte de la fase `nombre`"""
+        return _Fase(self, nombre)
+
+    def registrar(self, nombre, segundos, llamadas=1):
+        """Suma una medición hecha por fuera de fase()"""
+        self.segundos[nombre] = self.segundos.get(nombre, 0.0) + segundos
+        self.llamadas[nombre] = self.llamadas.get(nombre, 0) + llamadas
+
+    def resumen(self):
+        """{fase: {'segundos', 'llamadas'}} ordenado de mayor a menor tiempo, más 'total'"""
+        fases = sorted(self.segundos, key=self.segundos.get, reverse=True)
+        datos = {f: {"segundos": self.segundos[f], "llamadas": self.llamadas[f]} for f in fases}
+        datos["total"] = {"segundos": time.perf_counter() - self.inicio, "llamadas": 1}
+        return datos
+
+    def tabla(self):
+        """Resumen como tabla de texto, con el porcentaje del tiempo total de cada fase"""
+        datos = self.resumen()
+        total = datos["total"]["segundos"] or 1.0
+        lineas = [f"{'FASE':<12} | {'SEGUNDOS':>10} | {'%':>6} | {'LLAMADAS':>10} | {'µs/LLAMADA':>10}",
+                  "-" * 60]
+        for nombre, d in datos.items():
+            por_llamada = d["segundos"] / d["llamadas"] * 1e6 if d["llamadas"] else 0.0
+            lineas.append(f"{nombre:<12} | {d['segundos']:>10.4f} | {d['segundos'] / total:>6.1%} | "
+                          f"{d['llamadas']:>10} | {por_llamada:>10.1f}")
+        return "\n".join(lineas)
+
+    def a_json(self, ruta=None):
+        """Resumen en JSON; si se indica `ruta`, además lo guarda en ese archivo"""
+        texto = json.dumps(self.resumen(), indent=2, ensure_ascii=False)
+        if ruta is not None:
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(texto)
+        return texto
+
+
+class Histograma:
+    """Conteos por tramos fijos; el último tramo (más allá del mayor límite) es +inf"""
+
+    def __init__(self, limites):
+        self.limites = tuple(limites)
+        self.conteos = [0] * (len(self.limites) + 1)
+        self.total = 0
+        self.suma = 0.0
+
+    def observar(self, valor):
+        self.conteos[bisect.bisect_left(self.limites, valor)] += 1
+        self.total += 1
+        self.suma += valor
+
+    def percentil(self, p):
+        """Límite superior del tramo que contiene el percentil p (0-100)"""
+        if not self.total:
+            return 0.0
+        objetivo = p / 100 * self.total
+        acumulado = 0
+        for limite, conteo in zip(self.limites + (float("inf"),), self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return limite
+        return float("inf")
+
+    def a_dict(self):
+        tramos = {f"<={limite:g}": n for limite, n in zip(self.limites, self.conteos)}
+        tramos["+inf"] = self.conteos[-1]
+        return {"total": self.total, "media": self.suma / self.total if self.total else 0.0,
+                "p50": self.percentil(50), "p90": self.percentil(90), "p99": self.percentil(99),
+                "tramos": tramos}
+
+
+class _SinPerfilar:
+    """Perfilador desactivado: todas las fases comparten un contexto vacío"""
+    __slots__ = ()
+    _vacio = contextlib.nullcontext()
+
+    def fase(self, nombre):
+        return self._vacio
+
+    def registrar(self, nombre, segundos, llamadas=1):
+        pass
+
+
+SIN_PERFILAR = _SinPerfilar()
@@ -0,0 +1,129 @@
+"""
+Operadores de selección compartidos por los algoritmos genéticos del proyecto.
+
+Trabajan sobre índices y un arreglo (o lista) de fitness, nunca sobre la
+población, así que sirven igual para listas de tableros, listas de
+Individuo o tensores NumPy:
+
+- mejores / peores: élite por orden parcial (heapq para listas,
+  argpartition para arreglos), O(P + k log k) en vez de ordenar todo.
+- torneo: un torneo de k individuos distintos, O(k) por hijo.
+- torneos_lote: n torneos a la vez con un Generator de NumPy.
+- rango / rango_lote: selección por rango lineal (un orden por generación).
+
+Las funciones de listas usan `random` (o un random.Random); NumPy se importa
+solo en las versiones por lotes.
+"""
+import heapq
+import itertools
+import random
+
+
+def mejores(fitnesses, k, minimizar=True):
+    """Índices de los k mejores, del mejor al peor.
+    Con listas equivale a sorted(range(P), key=fitnesses.__getitem__)[:k]; con
+    arreglos, los empates en el corte pueden resolverse con cualquier índice.
+    """
+    n = len(fitnesses)
+    k = max(0, min(k, n))
+    if hasattr(fitnesses, "argpartition"):
+        clave = fitnesses if minimizar else -fitnesses
+        if k == 0:
+            return clave[:0].argsort()
+        if k < n:
+            elegidos = clave.argpartition(k - 1)[:k]
+            return elegidos[clave[elegidos].argsort(kind="stable")]
+        return clave.argsort(kind="stable")
+    seleccionar = heapq.nsmallest if minimizar else heapq.nlargest
+    return seleccionar(k, range(n), key=fitnesses.__getitem__)
+
+
+def peores(fitnesses, k, minimizar=True):
+    """Índices de los k peores, del peor al mejor"""
+    return mejores(fitnesses, k, not minimizar)
+
+
+def torneo(fitnesses, k=3, minimizar=True, rng=random):
+    """Índice del ganador de un torneo entre k individuos distintos"""
+    candidatos = rng.sample(range(len(fitnesses)), k)
+    elegir = min if minimizar else max
+    return elegir(candidatos, key=fitnesses.__getitem__)
+
+
+def torneos_lote(fit, n, rng, k=3, minimizar=True):
+    """n torneos de k individuos distintos a la vez; devuelve los índices ganadores.
+    `fit` es un arreglo NumPy y `rng` un np.random.Generator.
+    """
+    import numpy as np
+
+    P = len(fit)
+    # El j-ésimo candidato se sortea entre los P-j restantes y se corre
+    # sobre los ya elegidos (en orden creciente) para que no se repita
+    cand = np.empty((n, k), dtype=np.intp)
+    for j in range(k):
+        c = rng.integers(0, P - j, n)
+        for previo in np.sort(cand[:, :j], axis=1).T:
+            c += c >= previo
+        cand[:, j] = c
+    valores = fit[cand]
+    ganador = valores.argmin(axis=1) if minimizar else valores.argmax(axis=1)
+    return cand[np.arange(n), ganador]
+
+
+def _pesos_rango(P, presion):
+    """Pesos lineales por posición (0 = mejor): de `presion` a 2 - `presion`"""
+    if P == 1:
+        return [1.0]
+    return [presion - (2 * presion - 2) * r / (P - 1) for r in range(P)]
+
+
+def rango(fitnesses, n, minimizar=True, presion=1.5, rng=random):
+    """n índices por selección de rango lineal; `presion` entre 1 (uniforme) y 2.
+    Ordena una vez por generación y cada sorteo es O(log P).
+    """
+    orden = mejores(fitnesses, len(fitnesses), minimizar)
+    acumulados = list(itertools.accumulate(_pesos_rango(len(orden), presion)))
+    return [orden[r] for r in rng.choices(range(len(orden)), cum_weights=acumulados, k=n)]
+
+
+def rango_lote(fit, n, rng, minimizar=True, presion=1.5):
+    """Versión NumPy de `rango` con un np.random.Generator"""
+    import numpy as np
+
+    orden = mejores(fit, len(fit), minimizar)
+    pesos = np.asarray(_pesos_rango(len(orden), presion))
+    return orden[rng.choice(len(orden), n, p=pesos / pesos.sum())]
+
+
+def verificar_seleccion(tamaño=200, semilla=0):
+    """Comprueba mejores/peores contra un orden completo, los torneos y el rango lineal"""
+    import numpy as np
+
+    rng = random.Random(semilla)
+    fits = [rng.randrange(20) for _ in range(tamaño)]
+    orden = sorted(range(tamaño), key=fits.__getitem__)
+    for k in (0, 1, 10, tamaño, tamaño + 5):
+        assert mejores(fits, k) == orden[:k]
+        assert peores(fits, k) == sorted(range(tamaño), key=fits.__getitem__, reverse=True)[:k]
+        arreglo = np.asarray(fits)
+        assert arreglo[mejores(arreglo, k)].tolist() == sorted(fits)[:k]
+        assert arreglo[mejores(arreglo, k, minimizar=False)].tolist() == sorted(fits, reverse=True)[:k]
+    ganadores = torneos_lote(np.asarray(fits), 1000, np.random.default_rng(semilla), k=5)
+    assert all(fits[g] <= sorted(fits)[-5] for g in ganadores.tolist())
+    assert all(fits[torneo(fits, 5, rng=rng)] <= sorted(fits)[-5] for _ in range(100))
+
+    # Rango lineal: con presión 2 el peor tiene peso 0 y el mejor sale el
+    # doble que la mediana; con presión 1 el sorteo es uniforme
+    unicos = rng.sample(range(1000), tamaño)
+    arreglo = np.asarray(unicos)
+    peor = max(range(tamaño), key=unicos.__getitem__)
+    mejor = min(range(tamaño), key=unicos.__getitem__)
+    assert _pesos_rango(tamaño, 1.0) == [1.0] * tamaño
+    assert abs(sum(_pesos_rango(tamaño, 2.0)) - tamaño) < 1e-9
+    por_lista = rango(unicos, 20000, presion=2.0, rng=rng)
+    por_lote = rango_lote(arreglo, 20000, np.random.default_rng(semilla), presion=2.0).tolist()
+    for elegidos in (por_lista, por_lote):
+        assert peor not in elegidos and all(0 <= i < tamaño for i in elegidos)
+        assert elegidos.count(mejor) > 2 * 20000 / tamaño * 0.7
+    assert rango_lote(arreglo[:1], 5, np.random.default_rng(semilla)).tolist() == [0] * 5
+    return True
@@ -0,0 +1,489 @@
+"""
+Servidor local de resolución de Sudokus (HTTP/JSON sobre asyncio).
+
+Otros servicios piden soluciones por un socket local en lugar de lanzar
+`python sudoku.py`. Las solicitudes que llegan casi a la vez se agrupan en
+micro-lotes (hasta `max_lote` puzzles o `ventana` segundos) y cada lote se
+resuelve en un pool de procesos con sudoku_lote.resolver_uno.
+
+- Plazo por solicitud: si vence antes de la respuesta, se contesta 504. Un
+  puzzle vencido en la cola no llega al pool, y el que se está resolviendo
+  recibe lo que le queda de plazo como tiempo máximo.
+- Límite de concurrencia: con `limite` solicitudes en curso (en cola o
+  resolviéndose), las nuevas se rechazan con 503.
+- Métricas: profundidad de la cola y histogramas de latencia total, espera
+  en cola, tiempo de resolución y tamaño de lote, en GET /metricas.
+
+Rutas:
+    POST /resolver   {"tablero": "<81 caracteres>" o 9x9, "plazo": segundos}
+    GET  /metricas
+    GET  /salud
+
+Uso:
+    python servidor_sudoku.py --puerto 8765 --workers 4 --modo hibrido
+    python servidor_sudoku.py --verificar
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import cache_sudoku
+import sudoku_lote
+from perfilado import Histograma
+
+# Límites superiores (en segundos) de los tramos de los histogramas de latencia
+TRAMOS_LATENCIA = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 30)
+# Tramos para tamaños de lote y profundidad de cola
+TRAMOS_CONTEO = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+RAZONES = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error",
+           503: "Service Unavailable", 504: "Gateway Timeout"}
+
+
+class ServidorOcupado(RuntimeError):
+    """Se alcanzó el límite de solicitudes en curso"""
+
+
+# ---------------- TRABAJADOR ----------------
+def resolver_lote(tableros, plazos, opciones):
+    """
+    Resuelve un micro-lote en un proceso del pool; un resultado de resolver_uno
+    por tablero. `plazos[k]` son los segundos que le quedaban al puzzle k al
+    salir de la cola (None = sin plazo); si se agotan, su resultado es None.
+    Si un puzzle falla, su resultado es la excepción y el resto del lote sigue.
+    """
+    inicio = time.perf_counter()
+    resultados = []
+    for tablero, plazo in zip(tableros, plazos):
+        restante = None if plazo is None else plazo - (time.perf_counter() - inicio)
+        if restante is not None and restante <= 0:
+            resultados.append(None)
+            continue
+        try:
+            resultados.append(sudoku_lote.resolver_uno(tablero, tiempo_maximo=restante, **opciones))
+        except TimeoutError:
+            resultados.append(None)
+        except Exception as error:
+            resultados.append(error)
+    return resultados
+
+
+def leer_tablero(valor):
+    """Tablero 9x9 a partir de una línea de 81 caracteres o de una lista de 9 filas"""
+    if isinstance(valor, str):
+        return sudoku_lote.leer_puzzle(valor)
+    if (isinstance(valor, list) and len(valor) == 9
+            and all(isinstance(fila, list) and len(fila) == 9 for fila in valor)
+            and all(isinstance(v, int) and 0 <= v <= 9 for fila in valor for v in fila)):
+        return valor
+    raise ValueError("El tablero debe ser una línea de 81 caracteres o una lista de 9 filas de 9 enteros")
+
+
+class _Solicitud:
+    """Un puzzle esperando en la cola"""
+    __slots__ = ("tablero", "futuro", "llegada", "limite")
+
+    def __init__(self, tablero, futuro, llegada, limite):
+        self.tablero = tablero
+        self.futuro = futuro
+        self.llegada = llegada
+        self.limite = limite
+
+
+# ---------------- SERVIDOR ----------------
+class ServidorSudoku:
+    """
+    Agrupa solicitudes en micro-lotes y las resuelve en un pool de procesos.
+
+    - workers: procesos del pool (y lotes en vuelo a la vez)
+    - ventana: segundos que se espera a completar un lote desde su primera solicitud
+    - max_lote: puzzles máximos por lote
+    - limite: solicitudes en curso máximas antes de responder 503
+    - plazo: plazo por defecto de cada solicitud en segundos (None = sin plazo)
+    - cache: cache_sudoku.CacheSoluciones que se consulta antes de encolar
+      (un acierto responde sin pasar por la cola ni el límite)
+    - opciones: argumentos de sudoku_lote.resolver_uno (modo, generaciones, semilla, ...)
+    """
+
+    def __init__(self, workers=1, ventana=0.005, max_lote=16, limite=256, plazo=10.0, cache=None, **opciones):
+        self.workers = workers
+        self.ventana = ventana
+        self.max_lote = max_lote
+        self.limite = limite
+        self.plazo = plazo
+        self.cache = cache
+        self.opciones = {"modo": "hibrido", **opciones}
+        self.en_curso = 0
+        self.cola_maxima = 0
+        self.contadores = {"aceptadas": 0, "resueltas": 0, "rechazadas": 0, "vencidas": 0,
+                           "descartadas": 0, "errores": 0, "lotes": 0}
+        self.histogramas = {
+            "latencia": Histograma(TRAMOS_LATENCIA),
+            "espera_cola": Histograma(TRAMOS_LATENCIA),
+            "resolucion_lote": Histograma(TRAMOS_LATENCIA),
+            "tamaño_lote": Histograma(TRAMOS_CONTEO),
+            "profundidad_cola": Histograma(TRAMOS_CONTEO),
+        }
+        self._cola = None
+        self._pool = None
+        self._agrupador = None
+        self._lotes = set()
+        self._servidor = None
+
+    # --- ciclo de vida ---
+    async def iniciar(self, host="127.0.0.1", puerto=8765):
+        """Abre el socket y el pool; retorna (host, puerto) reales (puerto=0 elige uno libre)"""
+        self._cola = asyncio.Queue()
+        self._ranuras = asyncio.Semaphore(self.workers)
+        # forkserver (o spawn donde no existe, como en Windows): los procesos del pool
+        # no heredan los sockets de las conexiones abiertas (con fork, un cliente
+        # esperaría un cierre que no llega)
+        metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                         mp_context=multiprocessing.get_context(metodo))
+        # Arranque en caliente: los procesos ya importaron los solucionadores antes de la primera solicitud
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, resolver_lote, [], [], {})
+                               for _ in range(self.workers)))
+        self._agrupador = asyncio.create_task(self._agrupar())
+        self._servidor = await asyncio.start_server(self._atender, host, puerto)
+        return self._servidor.sockets[0].getsockname()[:2]
+
+    async def cerrar(self):
+        """Deja de aceptar conexiones, cancela la cola y espera los lotes en vuelo"""
+        self._servidor.close()
+        await self._servidor.wait_closed()
+        self._agrupador.cancel()
+        while not self._cola.empty():
+            self._cola.get_nowait().futuro.cancel()
+        await asyncio.gather(*self._lotes, return_exceptions=True)
+        self._pool.shutdown()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *excepcion):
+        if self._servidor is not None:
+            await self.cerrar()
+
+    # --- resolución ---
+    async def resolver(self, tablero, plazo=None):
+        """
+        Encola un tablero y espera su resultado (el dict de resolver_uno más
+        'lote' y 'latencia'). Lanza ServidorOcupado si se alcanzó el límite y
+        asyncio.TimeoutError si vence el plazo (por defecto, el del servidor).
+        """
+        if self.cache is not None:
+            resultado = self.cache.consultar(tablero)
+            if resultado is not None:
+                resultado["lote"], resultado["latencia"] = 0, resultado["segundos"]
+                self.histogramas["latencia"].observar(resultado["latencia"])
+                self.contadores["resueltas"] += 1
+                return resultado
+        if self.en_curso >= self.limite:
+            self.contadores["rechazadas"] += 1
+            raise ServidorOcupado(f"{self.en_curso} solicitudes en curso (límite {self.limite})")
+        plazo = self.plazo if plazo is None else plazo
+        loop = asyncio.get_running_loop()
+        llegada = loop.time()
+        solicitud = _Solicitud(tablero, loop.create_future(), llegada,
+                               llegada + plazo if plazo is not None else float("inf"))
+        self.en_curso += 1
+        self.contadores["aceptadas"] += 1
+        self.histogramas["profundidad_cola"].observar(self._cola.qsize())
+        self._cola.put_nowait(solicitud)
+        self.cola_maxima = max(self.cola_maxima, self._cola.qsize())
+        try:
+            # shield: al vencer se cancela el futuro a mano, y el agrupador lo descarta
+            resultado = await asyncio.wait_for(asyncio.shield(solicitud.futuro), plazo)
+        except asyncio.TimeoutError:
+            solicitud.futuro.cancel()
+            self.contadores["vencidas"] += 1
+            raise
+        finally:
+            self.en_curso -= 1
+        resultado["latencia"] = loop.time() - llegada
+        self.histogramas["latencia"].observar(resultado["latencia"])
+        if self.cache is not None:
+            self.cache.registrar(tablero, resultado)
+        self.contadores["resueltas"] += 1
+        return resultado
+
+    async def _agrupar(self):
+        """Forma un lote por cada ranura libre del pool y lo manda a resolver"""
+        loop = asyncio.get_running_loop()
+        while True:
+            # Se espera una ranura antes de armar el lote: bajo carga los lotes
+            # crecen y las solicitudes vencidas se descartan sin ocupar el pool
+            await self._ranuras.acquire()
+            lote = [await self._cola.get()]
+            cierre = loop.time() + self.ventana
+            while len(lote) < self.max_lote:
+                if self._cola.empty():
+                    restante = cierre - loop.time()
+                    if restante <= 0:
+                        break
+                    try:
+                        lote.append(await asyncio.wait_for(self._cola.get(), restante))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    lote.append(self._cola.get_nowait())
+            ahora = loop.time()
+            vigentes = [s for s in lote if not s.futuro.done() and s.limite > ahora]
+            self.contadores["descartadas"] += len(lote) - len(vigentes)
+            if not vigentes:
+                self._ranuras.release()
+                continue
+            for s in vigentes:
+                self.histogramas["espera_cola"].observar(ahora - s.llegada)
+            tarea = asyncio.create_task(self._ejecutar_lote(vigentes))
+            self._lotes.add(tarea)
+            tarea.add_done_callback(self._lotes.discard)
+
+    async def _ejecutar_lote(self, lote):
+        loop = asyncio.get_running_loop()
+        inicio = loop.time()
+        try:
+            ahora = loop.time()
+            plazos = [s.limite - ahora if s.limite != float("inf") else None for s in lote]
+            resultados = await loop.run_in_executor(self._pool, resolver_lote,
+                                                    [s.tablero for s in lote], plazos, self.opciones)
+        except Exception as error:
+            self.contadores["errores"] += len(lote)
+            for s in lote:
+                if not s.futuro.done():
+                    s.futuro.set_exception(error)
+            return
+        finally:
+            self._ranuras.release()
+        self.contadores["lotes"] += 1
+        self.histogramas["resolucion_lote"].observar(loop.time() - inicio)
+        self.histogramas["tamaño_lote"].observar(len(lote))
+        for s, resultado in zip(lote, resultados):
+            if s.futuro.done():
+                continue
+            if resultado is None:
+                s.futuro.set_exception(asyncio.TimeoutError())
+            elif isinstance(resultado, Exception):
+                self.contadores["errores"] += 1
+                s.futuro.set_exception(resultado)
+            else:
+                resultado["lote"] = len(lote)
+                s.futuro.set_result(resultado)
+
+    def metricas(self):
+        """Contadores, profundidad de la cola e histogramas, como dict serializable"""
+        return {
+            "en_curso": self.en_curso,
+            "cola": self._cola.qsize() if self._cola is not None else 0,
+            "cola_maxima": self.cola_maxima,
+            "lotes_en_vuelo": len(self._lotes),
+            **self.contadores,
+            "histogramas": {nombre: h.a_dict() for nombre, h in self.histogramas.items()},
+            "cache": self.cache.estadisticas() if self.cache is not None else None,
+        }
+
+    # --- HTTP ---
+    async def _atender(self, lector, escritor):
+        """Una solicitud HTTP por conexión"""
+        try:
+            try:
+                metodo, ruta, cuerpo = await _leer_solicitud(lector)
+            except (ValueError, asyncio.IncompleteReadError) as error:
+                estado, datos = 400, {"error": str(error)}
+            else:
+                estado, datos = await self._despachar(metodo, ruta, cuerpo)
+            escritor.write(_respuesta(estado, datos))
+            await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        if ruta == "/salud" and metodo == "GET":
+            return 200, {"estado": "ok"}
+        if ruta == "/metricas" and metodo == "GET":
+            return 200, self.metricas()
+        if ruta != "/resolver" or metodo != "POST":
+            return 404, {"error": f"{metodo} {ruta} no existe"}
+        try:
+            datos = json.loads(cuerpo or b"{}")
+            tablero = leer_tablero(datos.get("tablero"))
+            plazo = datos.get("plazo")
+            if plazo is not None and not (isinstance(plazo, (int, float)) and plazo > 0):
+                raise ValueError("El plazo debe ser un número de segundos mayor que 0")
+        except (ValueError, AttributeError) as error:
+            return 400, {"error": str(error)}
+        try:
+            resultado = await self.resolver(tablero, plazo)
+        except ServidorOcupado as error:
+            return 503, {"error": str(error)}
+        except asyncio.TimeoutError:
+            return 504, {"error": "Venció el plazo de la solicitud"}
+        except Exception as error:
+            return 500, {"error": f"{type(error).__name__}: {error}"}
+        return 200, {
+            "solucion": sudoku_lote.a_linea(resultado["solucion"]),
+            "resuelto": resultado["fitness"] == 0,
+            "sin_solucion": resultado["fitness"] is None,
+            "metodo": resultado["metodo"],
+            "segundos": resultado["segundos"],
+            "latencia": resultado["latencia"],
+            "lote": resultado["lote"],
+        }
+
+
+async def _leer_solicitud(lector):
+    """(método, ruta, cuerpo) de una solicitud HTTP/1.x"""
+    linea = await lector.readline()
+    partes = linea.decode("latin-1").split()
+    if len(partes) != 3 or not partes[2].startswith("HTTP/"):
+        raise ValueError("Línea de solicitud HTTP inválida")
+    largo = 0
+    while True:
+        cabecera = await lector.readline()
+        if cabecera in (b"\r\n", b"\n", b""):
+            break
+        nombre, _, valor = cabecera.decode("latin-1").partition(":")
+        if nombre.strip().lower() == "content-length":
+            largo = int(valor)
+    cuerpo = await lector.readexactly(largo) if largo else b""
+    return partes[0].upper(), partes[1], cuerpo
+
+
+def _respuesta(estado, datos):
+    cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+    cabeceras = (f"HTTP/1.1 {estado} {RAZONES[estado]}\r\n"
+                 "Content-Type: application/json; charset=utf-8\r\n"
+                 f"Content-Length: {len(cuerpo)}\r\n"
+                 "Connection: close\r\n\r\n")
+    return cabeceras.encode("latin-1") + cuerpo
+
+
+# ---------------- CLIENTE LOCAL ----------------
+async def pedir(host, puerto, metodo, ruta, datos=None):
+    """Hace una solicitud HTTP al servidor; retorna (estado, dict)"""
+    lector, escritor = await asyncio.open_connection(host, puerto)
+    try:
+        cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+        escritor.write((f"{metodo} {ruta} HTTP/1.1\r\nHost: {host}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(cuerpo)}\r\nConnection: close\r\n\r\n").encode("latin-1") + cuerpo)
+        await escritor.drain()
+        estado = int((await lector.readline()).split()[1])
+        respuesta = await lector.read()
+        return estado, json.loads(respuesta.partition(b"\r\n\r\n")[2])
+    finally:
+        escritor.close()
+
+
+async def resolver_remoto(host, puerto, tablero, plazo=None):
+    """Pide la solución de un tablero (línea de 81 caracteres o 9x9); retorna (estado, dict)"""
+    datos = {"tablero": tablero if isinstance(tablero, str) else sudoku_lote.a_linea(tablero)}
+    if plazo is not None:
+        datos["plazo"] = plazo
+    return await pedir(host, puerto, "POST", "/resolver", datos)
+
+
+async def _verificar(puzzles):
+    # Micro-lotes: solicitudes simultáneas comparten lote y todas se resuelven
+    cache = cache_sudoku.CacheSoluciones()
+    async with ServidorSudoku(workers=1, ventana=0.05, max_lote=8, modo="exacto", cache=cache) as servidor:
+        host, puerto = await servidor.iniciar(puerto=0)
+        respuestas = await asyncio.gather(*(resolver_remoto(host, puerto, p) for p in puzzles))
+        assert all(estado == 200 and r["resuelto"] for estado, r in respuestas), respuestas
+        assert max(r["lote"] for _, r in respuestas) > 1, "Las solicitudes simultáneas no se agruparon"
+        assert (await pedir(host, puerto, "POST", "/resolver", {"tablero": "123"}))[0] == 400
+        # Las variantes simétricas de puzzles ya resueltos salen de la cache
+        rng = np.random.default_rng(0)
+        variantes = [cache_sudoku.transformacion_aleatoria(rng).aplicar(sudoku_lote.leer_puzzle(p)) for p in puzzles]
+        respuestas = await asyncio.gather(*(resolver_remoto(host, puerto, v) for v in variantes))
+        assert all(estado == 200 and r["resuelto"] and r["metodo"] == "cache" for estado, r in respuestas)
+        estado, metricas = await pedir(host, puerto, "GET", "/metricas")
+        assert estado == 200 and metricas["resueltas"] == 2 * len(puzzles)
+        assert metricas["cache"]["tasa_acierto"] == 0.5
+
+    # Límite de concurrencia y plazos: el GA largo ocupa el pool, el resto espera o se rechaza
+    async with ServidorSudoku(workers=1, ventana=0.0, max_lote=1, limite=2, modo="ga",
+                              generaciones=100000, semilla=0) as servidor:
+        host, puerto = await servidor.iniciar(puerto=0)
+        respuestas = await asyncio.gather(*(resolver_remoto(host, puerto, puzzles[-1], plazo=0.3)
+                                            for _ in range(4)))
+        estados = sorted(estado for estado, _ in respuestas)
+        assert estados.count(503) == 2 and estados.count(504) == 2, estados
+        metricas = servidor.metricas()
+        assert metricas["rechazadas"] == 2 and metricas["vencidas"] == 2
+
+    # Un puzzle contradictorio no tumba a los demás puzzles de su lote
+    contradictorio = "12345678" + "0" * 9 + "9" + "0" * 63
+    async with ServidorSudoku(workers=1, ventana=0.05, max_lote=8, modo="ga", generaciones=50,
+                              propagar=True, semilla=0) as servidor:
+        host, puerto = await servidor.iniciar(puerto=0)
+        (estado, r), (estado_malo, malo) = await asyncio.gather(resolver_remoto(host, puerto, puzzles[0]),
+                                                            resolver_remoto(host, puerto, contradictorio))
+        assert estado == 200 and r["lote"] == 2 and estado_malo == 200 and malo["sin_solucion"], (r, malo)
+        assert servidor.metricas()["errores"] == 0
+    return True
+
+
+def verificar_servidor(puzzles=None):
+    """Levanta un servidor en un puerto libre y lo prueba con el cliente local"""
+    if puzzles is None:
+        ruta = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "dificil.sdm")
+        puzzles = [sudoku_lote.a_linea(t) for t in sudoku_lote.leer_archivo(ruta)][:6]
+    return asyncio.run(_verificar(puzzles))
+
+
+# ---------------- CLI ----------------
+async def servir(host, puerto, **parametros):
+    """Corre el servidor hasta que se interrumpa"""
+    async with ServidorSudoku(**parametros) as servidor:
+        host, puerto = await servidor.iniciar(host, puerto)
+        print(f"🧩 Servidor de Sudoku en http://{host}:{puerto} "
+              f"({servidor.workers} procesos, lotes de hasta {servidor.max_lote} en {servidor.ventana * 1000:g} ms)")
+        await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local HTTP/JSON de resolución de Sudokus")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="procesos del pool de resolución")
+    parser.add_argument("--ventana", type=float, default=0.005, help="segundos para completar un micro-lote")
+    parser.add_argument("--max-lote", type=int, default=16, help="puzzles máximos por micro-lote")
+    parser.add_argument("--limite", type=int, default=256, help="solicitudes en curso antes de responder 503")
+    parser.add_argument("--plazo", type=float, default=10.0, help="plazo por defecto de cada solicitud (segundos)")
+    parser.add_argument("--modo", choices=sudoku_lote.MODOS, default="hibrido")
+    parser.add_argument("--generaciones", type=int, default=1000, help="generaciones máximas del GA")
+    parser.add_argument("--semilla", type=int, help="semilla del GA (resultados reproducibles)")
+    parser.add_argument("--cache", nargs="?", const="", metavar="SQLITE",
+                        help="reutilizar soluciones de puzzles repetidos o simétricos (en memoria, o también en SQLITE)")
+    parser.add_argument("--verificar", action="store_true", help="probar el servidor con el cliente local y salir")
+    args = parser.parse_args(argv)
+
+    if args.verificar:
+        verificar_servidor()
+        print("✓ Micro-lotes, límite de concurrencia y plazos verificados")
+        return
+    cache = cache_sudoku.CacheSoluciones(ruta=args.cache or None) if args.cache is not None else None
+    try:
+        asyncio.run(servir(args.host, args.puerto, workers=args.workers, ventana=args.ventana,
+                           max_lote=args.max_lote, limite=args.limite, plazo=args.plazo, cache=cache,
+                           modo=args.modo, generaciones=args.generaciones, propagar=True, semilla=args.semilla))
+    except KeyboardInterrupt:
+        print("\n👋 Servidor detenido")
+    finally:
+        if cache is not None:
+            cache.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,15 @@
 import random
-import matplotlib.pyplot as plt
+import numpy as np
+
+import convergencia
+import seleccion
+from contexto import (ContextoSudoku, crear_tablas_conteo, fitness_desde_tablas, intercambiar_con_delta,
+                      par_intercambio, permutacion_con_candidatos, tamaño_caja)
+from contexto import verificar_delta as _verificar_delta
+from sudoku import propagar_restricciones
+
+# Generador para las llamadas sueltas; cada corrida crea el suyo con `semilla`
+_RNG = np.random.default_rng()
 
 # ---------------- SUDOKU BASE ----------------
 SUDOKU = [
@@ -15,40 +25,64 @@ SUDOKU = [
 ]
 
 # ---------------- UTILIDAD ----------------
+# Todas las funciones aceptan tableros de N x N con cajas de n x n (N = n²:
+# 9, 16, 25...); el tamaño se deduce del tablero o del ContextoSudoku.
 def mostrar(tablero, titulo="Sudoku"):
+    lado = len(tablero)
+    caja = tamaño_caja(lado)
+    ancho = len(str(lado))
+    separador = "-" * (lado * (ancho + 1) + 2 * caja + 1)
     print("\n" + titulo)
-    for i in range(9):
-        if i % 3 == 0:
-            print("-"*21)
-        for j in range(9):
-            if j % 3 == 0:
+    for i in range(lado):
+        if i % caja == 0:
+            print(separador)
+        for j in range(lado):
+            if j % caja == 0:
                 print("|", end=" ")
-            print(tablero[i][j], end=" ")
+            print(str(tablero[i][j]).rjust(ancho), end=" ")
         print("|")
-    print("-"*21)
+    print(separador)
 
 # ---------------- INDIVIDUO ----------------
-def crear_individuo(tablero):
-    """Crea individuo con filas válidas (1-9 sin repetir)"""
+def crear_individuo(ctx, rng=None):
+    """Crea individuo con filas válidas (1-N sin repetir) desde el ContextoSudoku.
+    Si el contexto trae `candidatos`, cada celda recibe uno de sus candidatos."""
+    rng = rng or _RNG
+    permutaciones = rng.random((ctx.lado, ctx.lado)).argsort(axis=1).tolist()
     ind = []
-    for fila in tablero:
-        fijos = [n for n in fila if n != 0]
-        libres = [n for n in range(1,10) if n not in fijos]
-        random.shuffle(libres)
+    for i, (fila, faltan, perm) in enumerate(zip(ctx.tablero, ctx.faltantes, permutaciones)):
+        libres = [faltan[k] for k in perm if k < len(faltan)]
+        if ctx.candidatos is not None:
+            asignacion = permutacion_con_candidatos(ctx.libres[i], libres, ctx.candidatos[i], rng)
+            if asignacion is not None:
+                ind.append([asignacion.get(j, n) for j, n in enumerate(fila)])
+                continue
         ind.append([n if n != 0 else libres.pop() for n in fila])
     return ind
 
+def preparar_contexto(tablero, propagar=False):
+    """ContextoSudoku del tablero. Con `propagar`, el del tablero reducido por
+    propagar_restricciones, con sus candidatos: los individuos y los
+    intercambios solo usan dígitos posibles de cada celda."""
+    if not propagar:
+        return ContextoSudoku(tablero)
+    reducido, candidatos = propagar_restricciones(tablero)
+    return ContextoSudoku(reducido, candidatos=candidatos)
+
 # ---------------- FITNESS ----------------
 def fitness(tablero):
-    """Cuenta conflictos en columnas y bloques 3x3"""
+    """Cuenta conflictos en columnas y bloques n x n"""
+    lado = len(tablero)
+    caja = tamaño_caja(lado)
     f = 0
     # Columnas
-    for i in range(9):
-        f += 9 - len(set(tablero[j][i] for j in range(9)))
-    # Bloques 3x3
-    for x in range(0,9,3):
-        for y in range(0,9,3):
-            f += 9 - len({tablero[x+i][y+j] for i in range(3) for j in range(3)})
+    for col in zip(*tablero):
+        f += lado - len(set(col))
+    # Bloques n x n
+    for x in range(0, lado, caja):
+        filas = tablero[x:x+caja]
+        for y in range(0, lado, caja):
+            f += lado - len({v for fila in filas for v in fila[y:y+caja]})
     return f
 
 # ---------------- SELECCIÓN ----------------
@@ -57,64 +91,156 @@ def seleccionar(pob):
     candidatos = random.sample(pob, 3)
     return min(candidatos, key=fitness)
 
+# ---------------- INDIVIDUO CON FITNESS EN CACHÉ ----------------
+class Individuo:
+    """Tablero junto con su fitness, calculado una sola vez al crearlo"""
+    __slots__ = ("tablero", "fitness")
+
+    def __init__(self, tablero, f):
+        self.tablero = tablero
+        self.fitness = f
+
 # ---------------- REPRODUCCIÓN (CORREGIDO) ----------------
-def reproducir(p1, p2, base, mut=0.3):
+# Cada hijo consume 2 + 3*max_mutaciones números en [0, 1): corte, cantidad de
+# intercambios y (fila, posición a, posición b) por intercambio. La corrida los
+# saca en bloque para toda la generación con sortear_reproduccion.
+def sortear_reproduccion(rng, n, max_mutaciones=3):
+    """Sorteos de n hijos, una lista por hijo"""
+    return rng.random((n, 2 + 3 * max_mutaciones)).tolist()
+
+def reproducir(p1, p2, ctx, rng=None, sorteo=None):
     """
     Cruce + mutación respetando filas válidas
     - Cruce por punto de corte (filas completas)
-    - Mutación intercambia dentro de filas
+    - Mutación: entre 1 y 3 intercambios dentro de filas, según `sorteo`
     """
+    if sorteo is None:
+        sorteo = sortear_reproduccion(rng or _RNG, 1)[0]
     hijo = []
-    corte = random.randint(1, 8)
+    lado = ctx.lado
+    corte = 1 + int(sorteo[0] * (lado - 1))
     
     # Cruce: primera parte de p1, segunda de p2
-    for i in range(9):
+    for i in range(lado):
         if i < corte:
             hijo.append(list(p1[i]))
         else:
             hijo.append(list(p2[i]))
     
     # Mutación: intercambiar valores no fijos en varias filas
-    num_mutaciones = random.randint(1, 3)
-    for _ in range(num_mutaciones):
-        i = random.randint(0, 8)
-        libres = [j for j in range(9) if base[i][j] == 0]
-        if len(libres) >= 2:
-            a, b = random.sample(libres, 2)
+    num_mutaciones = 1 + int(sorteo[1] * 3)
+    for m in range(num_mutaciones):
+        u_fila, u1, u2 = sorteo[2 + 3*m : 5 + 3*m]
+        i = int(u_fila * lado)
+        par = par_intercambio(ctx, hijo[i], i, u1, u2)
+        if par is not None:
+            a, b = par
             hijo[i][a], hijo[i][b] = hijo[i][b], hijo[i][a]
     
     return hijo
 
+# ---------------- FITNESS INCREMENTAL ----------------
+# Las tablas de conteo y el intercambio con delta son los de contexto.py
+
+def reproducir_delta(p1, p2, ctx, max_mutaciones=3, rng=None, sorteo=None):
+    """
+    Igual que `reproducir`, pero devuelve (hijo, fitness): las tablas de
+    conteo se crean una vez tras el cruce y cada intercambio las actualiza.
+    Hace entre 1 y `max_mutaciones` intercambios.
+    """
+    if sorteo is None:
+        sorteo = sortear_reproduccion(rng or _RNG, 1, max_mutaciones)[0]
+    lado = ctx.lado
+    corte = 1 + int(sorteo[0] * (lado - 1))
+    hijo = [list(p1[i]) if i < corte else list(p2[i]) for i in range(lado)]
+    cols, cajas = crear_tablas_conteo(hijo)
+    f = fitness_desde_tablas(cols, cajas)
+
+    num_mutaciones = 1 + int(sorteo[1] * max_mutaciones)
+    for m in range(num_mutaciones):
+        u_fila, u1, u2 = sorteo[2 + 3*m : 5 + 3*m]
+        i = int(u_fila * lado)
+        par = par_intercambio(ctx, hijo[i], i, u1, u2)
+        if par is not None:
+            f += intercambiar_con_delta(hijo, cols, cajas, i, *par, ctx.caja_de)
+
+    return hijo, f
+
+def verificar_delta(ctx, intercambios=2000, rng=None):
+    """Compara el fitness incremental con un recálculo completo en intercambios aleatorios"""
+    rng = rng or _RNG
+    return _verificar_delta(ctx, crear_individuo(ctx, rng), fitness, rng, intercambios)
+
 # ---------------- ALGORITMO GENÉTICO ----------------
-def algoritmo_genetico(tablero, poblacion=100, generaciones=1000):
-    """Algoritmo genético con elitismo"""
+def algoritmo_genetico(tablero, poblacion=100, generaciones=1000, controlador=None, semilla=None, propagar=False):
+    """Algoritmo genético con elitismo.
+    Con `propagar` corre primero propagar_restricciones y evoluciona el tablero
+    reducido, con individuos e intercambios restringidos a los candidatos.
+    Con `controlador` (convergencia.ControladorConvergencia) los intercambios
+    por hijo crecen con el estancamiento y la población se renueva o se
+    detiene según lo que pida el controlador.
+    Torneos, cortes e intercambios de cada generación se sacan en bloque de un
+    np.random.Generator creado con `semilla`: misma semilla, misma corrida.
+    """
     print("🧬 Iniciando algoritmo genético...")
     print(f"Población: {poblacion} | Generaciones: {generaciones}")
     
-    # Población inicial
-    pob = [crear_individuo(tablero) for _ in range(poblacion)]
+    # Contexto del puzzle (celdas libres y faltantes por fila), calculado una vez
+    ctx = preparar_contexto(tablero, propagar)
+    rng = np.random.default_rng(semilla)
+
+    # Población inicial: cada Individuo guarda su fitness
+    pob = []
+    for _ in range(poblacion):
+        t = crear_individuo(ctx, rng)
+        pob.append(Individuo(t, fitness(t)))
+    evaluaciones = poblacion
     hist = []
+    max_mutaciones = 3
+    mejor = None  # Mejor global: un reinicio puede descartar toda la población
     
     for g in range(generaciones):
-        # Ordenar por fitness (menor = mejor)
-        pob = sorted(pob, key=fitness)
-        best = fitness(pob[0])
+        # Fitness ya guardado en cada Individuo (menor = mejor), sin ordenar la población
+        fits = [ind.fitness for ind in pob]
+        mejor_gen = pob[fits.index(min(fits))]
+        if mejor is None or mejor_gen.fitness < mejor.fitness:
+            mejor = mejor_gen
+        best = mejor.fitness
         hist.append(best)
         
         # Verificar solución
         if best == 0:
             print(f"\n🎉 ¡Solución encontrada en generación {g}!")
-            return pob[0], hist
+            print(f"🔢 Evaluaciones de fitness: {evaluaciones}")
+            return mejor.tablero, hist, evaluaciones
+
+        # Control de convergencia
+        if controlador is not None:
+            accion = controlador.observar(fits, convergencia.diversidad([ind.tablero for ind in pob]))
+            max_mutaciones = max(1, round(3 * controlador.intensidad))
+            if accion == convergencia.DETENER:
+                print(f"\n⏹️ Estancado: se detiene en la generación {g}")
+                break
+            if accion is not None:
+                conservar = controlador.conservar(accion, poblacion, poblacion // 10)
+                nuevos = [crear_individuo(ctx, rng) for _ in range(poblacion - conservar)]
+                pob = [pob[i] for i in seleccion.mejores(fits, conservar)] + [Individuo(t, fitness(t)) for t in nuevos]
+                fits = [ind.fitness for ind in pob]
+                evaluaciones += len(nuevos)
         
-        # Elitismo: mantener top 10%
-        elite = pob[:poblacion//10]
-        nueva = elite[:]
+        # Elitismo: mantener top 10% (orden parcial)
+        nueva = [pob[i] for i in seleccion.mejores(fits, poblacion // 10)]
         
-        # Crear nueva generación
-        while len(nueva) < poblacion:
-            p1 = seleccionar(pob)
-            p2 = seleccionar(pob)
-            nueva.append(reproducir(p1, p2, tablero))
+        # Crear nueva generación (fitness del hijo por intercambios incrementales),
+        # con los torneos y sorteos de todos los hijos sacados de una vez
+        n_hijos = poblacion - len(nueva)
+        padres = seleccion.torneos_lote(np.asarray(fits), 2 * n_hijos, rng).tolist()
+        sorteos = sortear_reproduccion(rng, n_hijos, max_mutaciones)
+        for k in range(n_hijos):
+            p1, p2 = pob[padres[k]], pob[padres[n_hijos + k]]
+            hijo, f = reproducir_delta(p1.tablero, p2.tablero, ctx, max_mutaciones=max_mutaciones, sorteo=sorteos[k])
+            nueva.append(Individuo(hijo, f))
+        evaluaciones += n_hijos
         
         pob = nueva
         
@@ -123,33 +249,216 @@ def algoritmo_genetico(tablero, poblacion=100, generaciones=1000):
             print(f"Gen {g:4d} | Mejor fitness: {best:3d}")
     
     print(f"\n⚠️ No se encontró solución perfecta en {generaciones} generaciones")
-    return pob[0], hist
+    print(f"🔢 Evaluaciones de fitness: {evaluaciones}")
+    return mejor.tablero, hist, evaluaciones
 
-# ---------------- EJECUCIÓN ----------------
-print("="*50)
-print("PROYECTO: SUDOKU CON ALGORITMOS GENÉTICOS")
-print("="*50)
+# ---------------- MOTOR TENSORIAL (NumPy) ----------------
+# Toda la población vive en un solo arreglo (P, N, N) uint8 y se evalúa de una vez.
+# Las funciones de listas de arriba siguen siendo la implementación de referencia.
+def a_tensor(pob):
+    """Convierte una lista de tableros N x N en un arreglo (P, N, N) uint8"""
+    T = np.asarray(pob, dtype=np.uint8)
+    return T.reshape(-1, T.shape[-1], T.shape[-1])
 
-mostrar(SUDOKU, "SUDOKU INICIAL")
+def a_listas(T):
+    """Convierte un tablero (N, N) del tensor al formato de listas"""
+    return T.astype(int).tolist()
 
-# Ejecutar algoritmo
-solucion, historial = algoritmo_genetico(SUDOKU)
+def _contar_bits(M):
+    """Bits encendidos de cada máscara uint32"""
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(M)
+    M = M - ((M >> 1) & 0x55555555)
+    M = (M & 0x33333333) + ((M >> 2) & 0x33333333)
+    return (((M + (M >> 4)) & 0x0F0F0F0F) * 0x01010101) >> 24
 
-# Resultados
-mostrar(solucion, "MEJOR SOLUCIÓN ENCONTRADA")
-print(f"\n📊 Fitness final: {fitness(solucion)}")
+def mascaras_grupos(T):
+    """
+    Máscaras de dígitos presentes (bit v = dígito v) de cada columna y de cada
+    caja de cada tablero: dos arreglos (P, N) uint32. Hasta 31 dígitos caben
+    en un uint32, así que sirve hasta 25x25.
+    """
+    P, lado = T.shape[0], T.shape[1]
+    caja = tamaño_caja(lado)
+    bits = np.left_shift(np.uint32(1), T, dtype=np.uint32)
+    cols = np.bitwise_or.reduce(bits, axis=1)
+    # (P, banda, fila, pila, columna) -> (P, banda, pila, celdas de la caja)
+    por_caja = bits.reshape(P, caja, caja, caja, caja).transpose(0, 1, 3, 2, 4).reshape(P, lado, lado)
+    return cols, np.bitwise_or.reduce(por_caja, axis=2)
 
-if fitness(solucion) == 0:
-    print("✅ Sudoku resuelto correctamente")
-else:
-    print(f"⚠️ Quedan {fitness(solucion)} conflictos")
+def fitness_tensor(T):
+    """
+    Fitness de toda la población a la vez (mismos valores que `fitness`).
+    Cada grupo aporta N - dígitos distintos, y los distintos son los bits de
+    su máscara: O(P·N²) sin tablas de conteo de P·N·(N+1) entradas.
+    """
+    lado = T.shape[1]
+    cols, cajas = mascaras_grupos(T)
+    distintos = _contar_bits(cols).sum(axis=1, dtype=np.int64) + _contar_bits(cajas).sum(axis=1, dtype=np.int64)
+    return 2 * lado * lado - distintos
+
+def crear_poblacion_tensor(tablero, poblacion, rng, ctx=None):
+    """Población inicial (P, N, N) con filas válidas, como `crear_individuo`.
+    Si `ctx` trae candidatos, los individuos se crean con `crear_individuo`
+    (cada celda con uno de sus candidatos) y se pasan al tensor."""
+    if ctx is not None and ctx.candidatos is not None:
+        return a_tensor([crear_individuo(ctx, rng) for _ in range(poblacion)])
+    base = np.asarray(tablero, dtype=np.uint8)
+    lado = len(base)
+    T = np.broadcast_to(base, (poblacion, lado, lado)).copy()
+    for i in range(lado):
+        libres = np.flatnonzero(base[i] == 0)
+        faltan = np.setdiff1d(np.arange(1, lado + 1, dtype=np.uint8), base[i])
+        # Una permutación aleatoria de los faltantes por individuo
+        orden = rng.random((poblacion, len(faltan))).argsort(axis=1)
+        T[:, i, libres] = faltan[orden]
+    return T
+
+def _libres_por_fila(ctx):
+    """Tabla (N, N) con las columnas libres de cada fila (rellena con 0) y su cantidad"""
+    libres = np.zeros((ctx.lado, ctx.lado), dtype=np.intp)
+    n_libres = np.zeros(ctx.lado, dtype=np.intp)
+    for i, cols in enumerate(ctx.libres):
+        libres[i, :len(cols)] = cols
+        n_libres[i] = len(cols)
+    return libres, n_libres
+
+def seleccionar_tensor(fit, n, rng):
+    """Torneos de 3 individuos distintos, n a la vez; devuelve índices de ganadores"""
+    return seleccion.torneos_lote(fit, n, rng, k=3)
+
+def reproducir_tensor(T, i1, i2, libres, n_libres, rng, max_mutaciones=3, candidatos=None):
+    """Cruce por punto de corte + 1..max_mutaciones intercambios por hijo, como `reproducir`.
+    `candidatos` es la tabla (N, N) uint32 de máscaras de la propagación: los
+    intercambios que dejarían un valor fuera de los candidatos de su celda no se hacen."""
+    n, lado = len(i1), T.shape[1]
+    corte = rng.integers(1, lado, n)
+    de_p1 = np.arange(lado)[None, :] < corte[:, None]
+    hijos = np.where(de_p1[:, :, None], T[i1], T[i2])
+
+    filas_hijo = np.arange(n)
+    num_mutaciones = rng.integers(1, max_mutaciones + 1, n)
+    for m in range(max_mutaciones):
+        i = rng.integers(0, lado, n)
+        k = n_libres[i]
+        activo = (m < num_mutaciones) & (k >= 2)
+        # Dos posiciones libres distintas de la fila i
+        a = (rng.random(n) * k).astype(np.intp)
+        b = (rng.random(n) * np.maximum(k - 1, 1)).astype(np.intp)
+        b += b >= a
+        h, i = filas_hijo[activo], i[activo]
+        ja, jb = libres[i, a[activo]], libres[i, b[activo]]
+        if candidatos is not None:
+            permitido = ((candidatos[i, ja] >> hijos[h, i, jb]) & (candidatos[i, jb] >> hijos[h, i, ja]) & 1) == 1
+            h, i, ja, jb = h[permitido], i[permitido], ja[permitido], jb[permitido]
+        va = hijos[h, i, ja].copy()
+        hijos[h, i, ja] = hijos[h, i, jb]
+        hijos[h, i, jb] = va
+    return hijos
+
+def algoritmo_genetico_tensor(tablero, poblacion=100, generaciones=1000, semilla=None, controlador=None,
+                              propagar=False):
+    """Misma estrategia que `algoritmo_genetico` (también con `propagar`), con la población como tensor"""
+    print("🧬 Iniciando algoritmo genético (motor tensorial)...")
+    print(f"Población: {poblacion} | Generaciones: {generaciones}")
+
+    rng = np.random.default_rng(semilla)
+    ctx = preparar_contexto(tablero, propagar)
+    tablero = ctx.tablero
+    candidatos = None if ctx.candidatos is None else np.asarray(ctx.candidatos, dtype=np.uint32)
+    libres, n_libres = _libres_por_fila(ctx)
+    T = crear_poblacion_tensor(tablero, poblacion, rng, ctx)
+    hist = []
+    evaluaciones = 0
+    n_elite = poblacion // 10
+    max_mutaciones = 3
+    mejor, mejor_fit = None, None  # Mejor global, por si hay reinicios
+
+    for g in range(generaciones):
+        fit = fitness_tensor(T)
+        evaluaciones += len(T)
+        i_mejor = int(fit.argmin())
+        if mejor is None or fit[i_mejor] < mejor_fit:
+            mejor, mejor_fit = T[i_mejor].copy(), int(fit[i_mejor])
+        best = mejor_fit
+        hist.append(best)
+
+        if best == 0:
+            print(f"\n🎉 ¡Solución encontrada en generación {g}!")
+            return a_listas(mejor), hist, evaluaciones
+
+        if controlador is not None:
+            accion = controlador.observar(fit.tolist(), convergencia.diversidad(T))
+            max_mutaciones = max(1, round(3 * controlador.intensidad))
+            if accion == convergencia.DETENER:
+                print(f"\n⏹️ Estancado: se detiene en la generación {g}")
+                break
+            if accion is not None:
+                # Los peores se reemplazan por individuos nuevos, que se evalúan aquí
+                conservar = controlador.conservar(accion, poblacion, n_elite)
+                T = np.concatenate([T[seleccion.mejores(fit, conservar)],
+                                    crear_poblacion_tensor(tablero, poblacion - conservar, rng, ctx)])
+                fit = fitness_tensor(T)
+                evaluaciones += poblacion - conservar
+
+        # Elitismo (orden parcial) + hijos generados en bloque
+        n_hijos = poblacion - n_elite
+        i1 = seleccionar_tensor(fit, n_hijos, rng)
+        i2 = seleccionar_tensor(fit, n_hijos, rng)
+        T = np.concatenate([T[seleccion.mejores(fit, n_elite)],
+                            reproducir_tensor(T, i1, i2, libres, n_libres, rng, max_mutaciones, candidatos)])
+
+        if g % 50 == 0:
+            print(f"Gen {g:4d} | Mejor fitness: {best:3d}")
+
+    print(f"\n⚠️ No se encontró solución perfecta en {generaciones} generaciones")
+    return a_listas(mejor), hist, evaluaciones
 
 # ---------------- GRÁFICA ----------------
-plt.figure(figsize=(10, 6))
-plt.plot(historial, linewidth=2, color='blue')
-plt.xlabel("Generación", fontsize=12)
-plt.ylabel("Fitness (conflictos)", fontsize=12)
-plt.title("Evolución del Fitness - Algoritmo Genético", fontsize=14, fontweight='bold')
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+def graficar(historial):
+    """Gráfica de la evolución del fitness (matplotlib se carga solo aquí)"""
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(historial, linewidth=2, color='blue')
+    plt.xlabel("Generación", fontsize=12)
+    plt.ylabel("Fitness (conflictos)", fontsize=12)
+    plt.title("Evolución del Fitness - Algoritmo Genético", fontsize=14, fontweight='bold')
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.show()
+
+# ---------------- EJECUCIÓN ----------------
+def main():
+    print("="*50)
+    print("PROYECTO: SUDOKU CON ALGORITMOS GENÉTICOS")
+    print("="*50)
+
+    mostrar(SUDOKU, "SUDOKU INICIAL")
+
+    # Verificar que el motor tensorial da el mismo fitness que la referencia
+    ctx = ContextoSudoku(SUDOKU)
+    muestra = [crear_individuo(ctx) for _ in range(200)]
+    assert fitness_tensor(a_tensor(muestra)).tolist() == [fitness(t) for t in muestra]
+    print("✓ Motor tensorial: fitness idéntico a la referencia en 200 tableros")
+    verificar_delta(ctx)
+    print("✓ Fitness incremental idéntico al recálculo completo")
+    seleccion.verificar_seleccion()
+    print("✓ Élite por orden parcial idéntica al orden completo")
+
+    # Ejecutar algoritmo
+    solucion, historial, evaluaciones = algoritmo_genetico(SUDOKU)
+
+    # Resultados
+    mostrar(solucion, "MEJOR SOLUCIÓN ENCONTRADA")
+    print(f"\n📊 Fitness final: {fitness(solucion)}")
+
+    if fitness(solucion) == 0:
+        print("✅ Sudoku resuelto correctamente")
+    else:
+        print(f"⚠️ Quedan {fitness(solucion)} conflictos")
+
+    graficar(historial)
+
+if __name__ == "__main__":
+    main()
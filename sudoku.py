@@ -1,6 +1,22 @@
+import time
+from functools import lru_cache
+
 import numpy as np
-import random
-import matplotlib.pyplot as plt
+
+import convergencia
+from contexto import (ContextoSudoku, crear_tablas_conteo, dos_posiciones, fitness_desde_tablas,
+                      intercambiar_con_delta, par_intercambio, permutacion_con_candidatos, tamaño_caja)
+from contexto import verificar_delta as _verificar_delta
+import seleccion
+from perfilado import SIN_PERFILAR
+
+# Generador para las llamadas sueltas a los operadores; cada corrida del
+# algoritmo genético crea el suyo a partir de `semilla`
+_RNG = np.random.default_rng()
+
+def _generador(rng):
+    """El np.random.Generator recibido, o el del módulo si es None"""
+    return _RNG if rng is None else rng
 
 # Sudoku de prueba
 sudoku_inicial = [
@@ -15,34 +31,27 @@ sudoku_inicial = [
     [0, 0, 0, 0, 8, 0, 0, 7, 9]
 ]
 
-# TODO: implementar algoritmo genetico
-print("="*50)
-print("PROYECTO: SUDOKU CON ALGORITMOS GENÉTICOS")
-print("="*50)
-print("\nSudoku inicial cargado correctamente")
-print(f"Celdas vacías: {sum(row.count(0) for row in sudoku_inicial)}")
-
 def mostrar_sudoku(tablero, titulo="Sudoku"):
-    """Muestra el sudoku de forma visual con separadores"""
+    """Muestra el sudoku (9x9, 16x16, 25x25...) de forma visual con separadores"""
+    lado = len(tablero)
+    caja = tamaño_caja(lado)
+    ancho = len(str(lado))
+    separador = "-" * (lado * (ancho + 1) + 2 * caja + 1)
     print(f"\n{titulo}")
-    print("-" * 25)
-    for i in range(9):
-        if i % 3 == 0 and i != 0:
-            print("-" * 25)
+    print(separador)
+    for i in range(lado):
+        if i % caja == 0 and i != 0:
+            print(separador)
         linea = ""
-        for j in range(9):
-            if j % 3 == 0 and j != 0:
+        for j in range(lado):
+            if j % caja == 0 and j != 0:
                 linea += "| "
             if tablero[i][j] == 0:
-                linea += ". "
+                linea += ".".rjust(ancho) + " "
             else:
-                linea += str(tablero[i][j]) + " "
+                linea += str(tablero[i][j]).rjust(ancho) + " "
         print(linea)
-    print("-" * 25)
-
-# Probar visualización
-mostrar_sudoku(sudoku_inicial, "SUDOKU INICIAL")
-print(f"\nCeldas vacías: {sum(row.count(0) for row in sudoku_inicial)}")
+    print(separador)
 
 def obtener_posiciones_fijas(tablero):
     """
@@ -50,9 +59,9 @@ def obtener_posiciones_fijas(tablero):
     Retorna una matriz booleana del mismo tamaño
     """
     fijas = []
-    for i in range(9):
+    for i in range(len(tablero)):
         fila_fijas = []
-        for j in range(9):
+        for j in range(len(tablero)):
             # Si la celda tiene un número (no es 0), es fija
             fila_fijas.append(tablero[i][j] != 0)
         fijas.append(fila_fijas)
@@ -60,7 +69,7 @@ def obtener_posiciones_fijas(tablero):
 
 def estadisticas_tablero(tablero, fijas):
     """Muestra estadísticas del tablero"""
-    total_celdas = 81
+    total_celdas = len(tablero) ** 2
     celdas_fijas = sum(sum(fila) for fila in fijas)
     celdas_vacias = total_celdas - celdas_fijas
     
@@ -70,69 +79,55 @@ def estadisticas_tablero(tablero, fijas):
     print(f"  Celdas a llenar: {celdas_vacias}")
     print(f"  Porcentaje completo: {(celdas_fijas/total_celdas)*100:.1f}%")
 
-# Probar
-posiciones_fijas = obtener_posiciones_fijas(sudoku_inicial)
-estadisticas_tablero(sudoku_inicial, posiciones_fijas)
-
-def crear_individuo(tablero_original, fijas):
+def crear_individuo(contexto, rng=None):
     """
-    Crea un individuo (tablero completo de sudoku)
+    Crea un individuo (tablero completo de sudoku) a partir del
+    ContextoSudoku del puzzle, con el np.random.Generator `rng`
     
     ESTRATEGIA:
-    - Cada fila debe tener números del 1 al 9 sin repetir
+    - Cada fila debe tener números del 1 al N sin repetir (N = contexto.lado)
     - Respeta los números fijos del sudoku original
     - Llena las celdas vacías con números aleatorios disponibles
+    - Si el contexto trae `candidatos` (ver propagar_restricciones), cada
+      celda solo recibe dígitos de su máscara de candidatos
     
     Esto garantiza que no haya conflictos en las filas
     """
+    rng = _generador(rng)
     nuevo_tablero = []
+    # Una permutación de 0..N-1 por fila, sacadas juntas
+    lado = contexto.lado
+    permutaciones = rng.random((lado, lado)).argsort(axis=1).tolist()
     
-    for i in range(9):
-        fila = list(tablero_original[i])
+    for i in range(lado):
+        fila = list(contexto.tablero[i])
         
-        # Obtener números que ya están fijos en esta fila
-        numeros_fijos = [fila[j] for j in range(9) if fijas[i][j]]
+        # Números disponibles (los que no están fijos en la fila), en orden aleatorio
+        faltantes = contexto.faltantes[i]
+        disponibles = [faltantes[k] for k in permutaciones[i] if k < len(faltantes)]
         
-        # Números disponibles: los que no están fijos en la fila
-        disponibles = [n for n in range(1, 10) if n not in numeros_fijos]
-        random.shuffle(disponibles)
+        libres = contexto.libres[i]
+        if contexto.candidatos is not None:
+            asignacion = permutacion_con_candidatos(libres, disponibles, contexto.candidatos[i], rng)
+            if asignacion is not None:
+                disponibles = [asignacion[j] for j in libres]
         
         # Llenar las celdas vacías con números disponibles
-        indice = 0
-        for j in range(9):
-            if not fijas[i][j]:  # Si la celda no es fija
-                fila[j] = disponibles[indice]
-                indice += 1
+        for j, n in zip(libres, disponibles):
+            fila[j] = n
         
         nuevo_tablero.append(fila)
     
     return nuevo_tablero
 
-# Probar creación de individuo
-print("\n" + "="*50)
-print("CREACIÓN DE INDIVIDUO")
-print("="*50)
-
-individuo_test = crear_individuo(sudoku_inicial, posiciones_fijas)
-mostrar_sudoku(individuo_test, "INDIVIDUO GENERADO (tablero completo)")
-
-# Verificar que no hay repeticiones en filas
-print("\n✓ Verificando que no haya repeticiones en filas...")
-for i, fila in enumerate(individuo_test):
-    if len(set(fila)) != 9:
-        print(f"  ⚠ Error en fila {i+1}")
-    else:
-        print(f"  ✓ Fila {i+1}: OK")
-print("✓ Todas las filas tienen números del 1-9 sin repetir")
-
-def crear_poblacion(tablero_original, fijas, tamaño=100):
+def crear_poblacion(contexto, tamaño=100, rng=None):
     """
     Crea la población inicial de individuos
     
     Args:
-        tablero_original: Sudoku inicial con celdas vacías
-        fijas: Matriz de posiciones fijas
+        contexto: ContextoSudoku del puzzle (tablero, fijas y candidatos)
         tamaño: Número de individuos en la población
+        rng: np.random.Generator de la corrida
     
     Returns:
         Lista de individuos (tableros completos)
@@ -141,7 +136,7 @@ def crear_poblacion(tablero_original, fijas, tamaño=100):
     print(f"\n🧬 Generando población de {tamaño} individuos...")
     
     for i in range(tamaño):
-        individuo = crear_individuo(tablero_original, fijas)
+        individuo = crear_individuo(contexto, rng)
         poblacion.append(individuo)
         
         # Mostrar progreso cada 20 individuos
@@ -157,102 +152,323 @@ def mostrar_muestra_poblacion(poblacion, n=3):
     for i in range(min(n, len(poblacion))):
         mostrar_sudoku(poblacion[i], f"Individuo #{i+1}")
 
-# Crear población inicial
-TAMAÑO_POBLACION = 50  # Empezamos con 50 para pruebas
-poblacion = crear_poblacion(sudoku_inicial, posiciones_fijas, TAMAÑO_POBLACION)
-
-# Mostrar muestra
-mostrar_muestra_poblacion(poblacion, 2)
-
-print("\n" + "="*50)
-print("PARTE 1 COMPLETADA: Representación del individuo ✓")
-print("="*50)
-
 # PARTE 2: ALGORITMO GENÉTICO
 
 def calcular_fitness(tablero):
     """
-    Calcula el fitness de un tablero de Sudoku.
-    Fitness = número de conflictos (duplicados en columnas y cajas 3x3)
+    Calcula el fitness de un tablero de Sudoku de N x N (cajas de n x n, N = n²).
+    Fitness = número de conflictos (duplicados en columnas y cajas)
     Menor fitness es mejor (0 = solución perfecta)
     """
+    lado = len(tablero)
+    n = tamaño_caja(lado)
     fitness = 0
     
     # Verificar columnas
-    for j in range(9):
-        columna = [tablero[i][j] for i in range(9)]
-        fitness += 9 - len(set(columna))  # Número de duplicados
+    for columna in zip(*tablero):
+        fitness += lado - len(set(columna))  # Número de duplicados
     
-    # Verificar cajas 3x3
-    for caja_i in range(0, 9, 3):
-        for caja_j in range(0, 9, 3):
-            caja = []
-            for i in range(3):
-                for j in range(3):
-                    caja.append(tablero[caja_i + i][caja_j + j])
-            fitness += 9 - len(set(caja))  # Número de duplicados
+    # Verificar cajas n x n
+    for caja_i in range(0, lado, n):
+        filas = tablero[caja_i:caja_i + n]
+        for caja_j in range(0, lado, n):
+            caja = set()
+            for fila in filas:
+                caja.update(fila[caja_j:caja_j + n])
+            fitness += lado - len(caja)  # Número de duplicados
     
     return fitness
 
-def seleccion_torneo(poblacion, fitnesses, k=3):
+def seleccion_torneo(poblacion, fitnesses, rng, k=3):
     """
-    Selección por torneo: selecciona k individuos aleatorios y devuelve el mejor
+    Selección por torneo: selecciona k individuos aleatorios y devuelve el mejor.
+    El torneo se sortea sobre índices, sin copiar la población, con el
+    np.random.Generator `rng` de la corrida.
     """
-    seleccionados = random.sample(list(zip(poblacion, fitnesses)), k)
-    return min(seleccionados, key=lambda x: x[1])[0]  # El de menor fitness
+    return poblacion[seleccion.torneos_lote(np.asarray(fitnesses), 1, rng, k)[0]]  # El de menor fitness
 
-def cruce_padres(padre1, padre2, fijas):
+def cruce_padres(padre1, padre2, contexto, rng=None, sorteo=None):
     """
     Cruce entre dos padres para generar un hijo.
     Estrategia: para cada fila, elegir aleatoriamente del padre1 o padre2,
     pero respetando las posiciones fijas.
+    Las celdas fijas se copian del tablero del `contexto`.
+    `sorteo` son N números en [0, 1), uno por fila, ya sacados en bloque
+    para toda la generación; si falta, se sacan de `rng`.
     """
+    if sorteo is None:
+        sorteo = _generador(rng).random(contexto.lado).tolist()
     hijo = []
-    for i in range(9):
-        if random.random() < 0.5:
+    for i in range(contexto.lado):
+        if sorteo[i] < 0.5:
             fila_hijo = list(padre1[i])
         else:
             fila_hijo = list(padre2[i])
         
         # Asegurar que las posiciones fijas se mantengan del original
-        for j in range(9):
-            if fijas[i][j]:
-                fila_hijo[j] = sudoku_inicial[i][j]
+        for j, v in contexto.fijos_fila[i]:
+            fila_hijo[j] = v
         
         hijo.append(fila_hijo)
     
     return hijo
 
-def mutacion(individuo, fijas, tasa_mutacion=0.1):
+def mutacion(individuo, contexto, tasa_mutacion=0.1, rng=None, sorteo=None):
     """
-    Mutación: intercambiar dos posiciones no fijas en filas aleatorias
+    Mutación: intercambiar dos posiciones no fijas en filas aleatorias.
+    `sorteo` trae, por fila, [moneda, u1, u2] en [0, 1): la moneda decide si
+    la fila muta y u1, u2 qué posiciones se intercambian. Si falta, se saca de `rng`.
     """
+    if sorteo is None:
+        sorteo = _generador(rng).random((contexto.lado, 3)).tolist()
     mutado = [fila[:] for fila in individuo]  # Copia profunda
     
-    for i in range(9):
-        if random.random() < tasa_mutacion:
-            # Encontrar posiciones no fijas en esta fila
-            posiciones_libres = [j for j in range(9) if not fijas[i][j]]
+    for i in range(contexto.lado):
+        moneda, u1, u2 = sorteo[i]
+        if moneda < tasa_mutacion:
+            # Posiciones no fijas de esta fila (precalculadas en el contexto)
+            posiciones_libres = contexto.libres[i]
             if len(posiciones_libres) >= 2:
                 # Intercambiar dos posiciones aleatorias
-                j1, j2 = random.sample(posiciones_libres, 2)
+                j1, j2 = dos_posiciones(posiciones_libres, u1, u2)
                 mutado[i][j1], mutado[i][j2] = mutado[i][j2], mutado[i][j1]
     
     return mutado
 
-def algoritmo_genetico(tablero_original, fijas, tamaño_poblacion=100, generaciones=1000, tasa_mutacion=0.1, elitismo=0.1):
+# FITNESS INCREMENTAL (tablas de conteo)
+
+def mutacion_delta(individuo, contexto, tasa_mutacion=0.1, rng=None, sorteo=None):
+    """
+    Igual que `mutacion` (mismo `sorteo`), pero mantiene las tablas de conteo
+    del hijo y actualiza su fitness con cada intercambio en lugar de recalcularlo.
+    Si el contexto trae `candidatos`, solo se intercambian celdas cuyos
+    valores son candidatos de la otra celda.
+    Retorna (mutado, fitness, (cols, cajas))
+    """
+    if sorteo is None:
+        sorteo = _generador(rng).random((contexto.lado, 3)).tolist()
+    mutado = [fila[:] for fila in individuo]
+    cols, cajas = crear_tablas_conteo(mutado)
+    fitness = fitness_desde_tablas(cols, cajas)
+
+    for i in range(contexto.lado):
+        moneda, u1, u2 = sorteo[i]
+        if moneda < tasa_mutacion:
+            par = par_intercambio(contexto, mutado[i], i, u1, u2)
+            if par is not None:
+                fitness += intercambiar_con_delta(mutado, cols, cajas, i, *par, contexto.caja_de)
+
+    return mutado, fitness, (cols, cajas)
+
+def verificar_delta(contexto, intercambios=2000, rng=None):
+    """
+    Comprueba el fitness incremental contra un recálculo completo
+    aplicando intercambios aleatorios sobre un individuo.
+    """
+    rng = _generador(rng)
+    return _verificar_delta(contexto, crear_individuo(contexto, rng), calcular_fitness, rng, intercambios)
+
+# PREPROCESAMIENTO: PROPAGACIÓN DE RESTRICCIONES
+
+@lru_cache(maxsize=None)
+def unidades_y_vecinos(caja=3):
+    """
+    Las 3N unidades (filas, columnas y cajas) de un tablero con cajas de
+    `caja` x `caja` y los vecinos de cada celda, calculados una vez por tamaño.
+    """
+    lado = caja * caja
+    unidades = ([[(i, j) for j in range(lado)] for i in range(lado)] +
+                [[(i, j) for i in range(lado)] for j in range(lado)] +
+                [[(ci + i, cj + j) for i in range(caja) for j in range(caja)]
+                 for ci in range(0, lado, caja) for cj in range(0, lado, caja)])
+    vecinos = [[sorted(({(i, k) for k in range(lado)} | {(k, j) for k in range(lado)} |
+                        {(i // caja * caja + a, j // caja * caja + b) for a in range(caja) for b in range(caja)})
+                       - {(i, j)})
+                for j in range(lado)]
+               for i in range(lado)]
+    return unidades, vecinos
+
+def propagar_restricciones(tablero_original):
+    """
+    Etapa previa al algoritmo genético.
+    Aplica singles desnudos (celda con un solo candidato) y singles ocultos
+    (dígito con una sola celda posible en su unidad) hasta que no haya cambios.
+
+    Retorna (tablero, candidatos): el tablero con todas las celdas forzadas ya
+    llenas y, por celda vacía, una máscara de bits con sus dígitos posibles
+    (0 en las celdas llenas). Lanza ValueError si el sudoku no tiene solución.
+    Sirve para cualquier N: las máscaras son enteros de N + 1 bits.
+    """
+    tablero = [fila[:] for fila in tablero_original]
+    lado = len(tablero)
+    unidades, vecinos = unidades_y_vecinos(tamaño_caja(lado))
+    todos = (1 << (lado + 1)) - 2
+    candidatos = [[0] * lado for _ in range(lado)]
+    for i in range(lado):
+        for j in range(lado):
+            if tablero[i][j] == 0:
+                usados = 0
+                for a, b in vecinos[i][j]:
+                    usados |= 1 << tablero[a][b]
+                candidatos[i][j] = todos & ~usados
+
+    def colocar(i, j, v):
+        tablero[i][j] = v
+        candidatos[i][j] = 0
+        for a, b in vecinos[i][j]:
+            candidatos[a][b] &= ~(1 << v)
+
+    cambio = True
+    while cambio:
+        cambio = False
+
+        # Singles desnudos
+        for i in range(lado):
+            for j in range(lado):
+                if tablero[i][j] == 0:
+                    mascara = candidatos[i][j]
+                    if mascara == 0:
+                        raise ValueError(f"La celda ({i}, {j}) no tiene candidatos")
+                    if mascara & (mascara - 1) == 0:
+                        colocar(i, j, mascara.bit_length() - 1)
+                        cambio = True
+
+        # Singles ocultos
+        for unidad in unidades:
+            presentes = 0
+            for i, j in unidad:
+                presentes |= 1 << tablero[i][j]
+            for v in range(1, lado + 1):
+                if presentes >> v & 1:
+                    continue
+                celdas = [(i, j) for i, j in unidad if candidatos[i][j] >> v & 1]
+                if not celdas:
+                    raise ValueError(f"El dígito {v} no cabe en ninguna celda de una unidad")
+                if len(celdas) == 1:
+                    colocar(*celdas[0], v)
+                    presentes |= 1 << v
+                    cambio = True
+
+    return tablero, candidatos
+
+def resolver_con_propagacion(tablero_original, **opciones):
+    """
+    Propaga restricciones y, solo si quedan celdas sin resolver, ejecuta el
+    algoritmo genético sobre el tablero reducido con sus candidatos.
+    Retorna lo mismo que `algoritmo_genetico` (generación 0 si no hizo falta el GA).
+    Lanza ValueError si la propagación demuestra que el sudoku no tiene solución.
+    """
+    reducido, candidatos = propagar_restricciones(tablero_original)
+    vacias = sum(fila.count(0) for fila in reducido)
+    print(f"\n🔎 Propagación: {sum(fila.count(0) for fila in tablero_original) - vacias} celdas forzadas, "
+          f"quedan {vacias}")
+    if vacias == 0:
+        print("🎉 ¡Resuelto solo con propagación, sin algoritmo genético!")
+        return reducido, [0], [0], 0, 0
+
+    fijas = obtener_posiciones_fijas(reducido)
+    return algoritmo_genetico(reducido, fijas, candidatos=candidatos, **opciones)
+
+def evolucionar_generacion(poblacion, fitnesses, contexto, tasa_mutacion=0.1, num_elite=10, perfilador=None,
+                           rng=None):
+    """
+    Produce la siguiente generación a partir de la actual, con los
+    operadores aplicados sobre el ContextoSudoku del puzzle.
+    Retorna (nueva_poblacion, nuevos_fitnesses); solo se evalúan los hijos nuevos.
+    Todos los números aleatorios de la generación (torneos, cruces y
+    mutaciones) se sacan en bloque del np.random.Generator `rng`.
+    Con `perfilador` (perfilado.Perfilador) mide las fases copia, seleccion,
+    cruce y mutacion (que incluye el fitness incremental del hijo).
+    """
+    perfilador = perfilador or SIN_PERFILAR
+    rng = _generador(rng)
+    nueva_poblacion = []
+    n_hijos = len(poblacion) - num_elite
+
+    # ELITISMO: Preservar los mejores individuos
+    with perfilador.fase("copia"):
+        elite_indices = seleccion.mejores(fitnesses, num_elite)
+        elite = [poblacion[i] for i in elite_indices]
+        nueva_poblacion.extend(elite)
+        nuevos_fitnesses = [fitnesses[i] for i in elite_indices]
+
+    # Sorteos de toda la generación: dos torneos, una fila de cruce y
+    # (moneda, u1, u2) por fila de mutación para cada hijo
+    with perfilador.fase("seleccion"):
+        ganadores = seleccion.torneos_lote(np.asarray(fitnesses), 2 * n_hijos, rng).tolist()
+    with perfilador.fase("cruce"):
+        sorteo_cruce = rng.random((n_hijos, contexto.lado)).tolist()
+    with perfilador.fase("mutacion"):
+        sorteo_mutacion = rng.random((n_hijos, contexto.lado, 3)).tolist()
+
+    # Generar el resto de la población
+    for k in range(n_hijos):
+        # Selección
+        with perfilador.fase("seleccion"):
+            padre1 = poblacion[ganadores[k]]
+            padre2 = poblacion[ganadores[n_hijos + k]]
+
+        # Cruce
+        with perfilador.fase("cruce"):
+            hijo = cruce_padres(padre1, padre2, contexto, sorteo=sorteo_cruce[k])
+
+        # Mutación (el fitness del hijo se actualiza por intercambio)
+        with perfilador.fase("mutacion"):
+            hijo, fitness_hijo, _ = mutacion_delta(hijo, contexto, tasa_mutacion, sorteo=sorteo_mutacion[k])
+
+        nueva_poblacion.append(hijo)
+        nuevos_fitnesses.append(fitness_hijo)
+
+    return nueva_poblacion, nuevos_fitnesses
+
+def renovar_poblacion(poblacion, fitnesses, conservar, contexto, rng=None):
+    """
+    Conserva los `conservar` mejores y completa la población con individuos nuevos.
+    Retorna (poblacion, fitnesses, evaluaciones_nuevas).
     """
-    Algoritmo genético principal para resolver Sudoku con elitismo
+    orden = seleccion.mejores(fitnesses, conservar)
+    nuevos = [crear_individuo(contexto, rng) for _ in range(len(poblacion) - len(orden))]
+    return ([poblacion[i] for i in orden] + nuevos,
+            [fitnesses[i] for i in orden] + [calcular_fitness(t) for t in nuevos],
+            len(nuevos))
+
+def algoritmo_genetico(tablero_original, fijas, tamaño_poblacion=100, generaciones=1000, tasa_mutacion=0.1, elitismo=0.1,
+                       candidatos=None, controlador=None, callback=None, perfilador=None, semilla=None,
+                       tiempo_maximo=None):
     """
+    Algoritmo genético principal para resolver Sudoku con elitismo.
+    Toda la aleatoriedad sale de un np.random.Generator creado con `semilla`
+    (entero, None o un Generator ya creado): con la misma semilla, la corrida
+    se repite bit a bit y no comparte estado con otros hilos.
+    Con `candidatos` (ver propagar_restricciones) los individuos y las
+    mutaciones se restringen a los dígitos posibles de cada celda.
+    Con `controlador` (convergencia.ControladorConvergencia) la tasa de
+    mutación se adapta al estancamiento y la población recibe individuos
+    nuevos, se reinicia o se detiene según lo que pida el controlador.
+    Con `callback`, al final de cada generación se le pasa un dict con
+    'generacion', 'mejor', 'media', 'tasa_mutacion' y 'evaluaciones'.
+    Con `perfilador` (perfilado.Perfilador) acumula tiempo y llamadas por fase:
+    inicio, evaluacion, copia, seleccion, cruce, mutacion, convergencia y registro.
+    El ContextoSudoku del puzzle se construye una vez y lo reciben todos los operadores.
+    Con `tiempo_maximo` (segundos) se detiene al agotarlo y retorna el mejor hasta ese momento.
+    """
+    limite = time.perf_counter() + tiempo_maximo if tiempo_maximo is not None else None
+    perfilador = perfilador or SIN_PERFILAR
     print("\n" + "="*60)
     print("🚀 INICIANDO ALGORITMO GENÉTICO")
     print("="*60)
 
     # Crear población inicial
-    poblacion = crear_poblacion(tablero_original, fijas, tamaño_poblacion)
-
-    # Calcular fitness inicial
-    fitnesses = [calcular_fitness(ind) for ind in poblacion]
+    with perfilador.fase("inicio"):
+        rng = np.random.default_rng(semilla)
+        contexto = ContextoSudoku(tablero_original, fijas, candidatos)
+        poblacion = crear_poblacion(contexto, tamaño_poblacion, rng)
+
+    # Calcular fitness inicial (cada individuo se evalúa una sola vez;
+    # el fitness viaja en la lista `fitnesses`, paralela a la población)
+    with perfilador.fase("evaluacion"):
+        fitnesses = [calcular_fitness(ind) for ind in poblacion]
+    evaluaciones = len(poblacion)
     mejor_fitness = min(fitnesses)
     mejor_individuo = poblacion[fitnesses.index(mejor_fitness)]
 
@@ -269,48 +485,34 @@ def algoritmo_genetico(tablero_original, fijas, tamaño_poblacion=100, generacio
     num_elite = int(tamaño_poblacion * elitismo)
 
     for gen in range(1, generaciones + 1):
-        nueva_poblacion = []
-
-        # Calcular fitness de la población actual
-        fitnesses = [calcular_fitness(ind) for ind in poblacion]
-
-        # ELITISMO: Preservar los mejores individuos
-        elite_indices = sorted(range(len(fitnesses)), key=lambda i: fitnesses[i])[:num_elite]
-        elite = [poblacion[i] for i in elite_indices]
-        nueva_poblacion.extend(elite)
-
-        # Generar el resto de la población
-        while len(nueva_poblacion) < tamaño_poblacion:
-            # Selección
-            padre1 = seleccion_torneo(poblacion, fitnesses)
-            padre2 = seleccion_torneo(poblacion, fitnesses)
-
-            # Cruce
-            hijo = cruce_padres(padre1, padre2, fijas)
-
-            # Mutación
-            hijo = mutacion(hijo, fijas, tasa_mutacion)
-
-            nueva_poblacion.append(hijo)
+        if controlador is not None:
+            tasa_mutacion = controlador.tasa_mutacion
 
-        # Actualizar población
-        poblacion = nueva_poblacion
-        fitnesses = [calcular_fitness(ind) for ind in poblacion]
+        # Selección, cruce y mutación de una generación completa
+        poblacion, fitnesses = evolucionar_generacion(poblacion, fitnesses, contexto, tasa_mutacion, num_elite,
+                                                      perfilador, rng)
+        evaluaciones += tamaño_poblacion - num_elite
 
         # Encontrar el mejor de esta generación
-        mejor_fitness_gen = min(fitnesses)
-        mejor_individuo_gen = poblacion[fitnesses.index(mejor_fitness_gen)]
+        with perfilador.fase("evaluacion"):
+            mejor_fitness_gen = min(fitnesses)
+            mejor_individuo_gen = poblacion[fitnesses.index(mejor_fitness_gen)]
 
         # Actualizar mejor global
         if mejor_fitness_gen < mejor_fitness:
             mejor_fitness = mejor_fitness_gen
             mejor_individuo = mejor_individuo_gen
 
-        # Registrar en historial cada 50 generaciones
-        if gen % 50 == 0:
-            historial_fitness.append(mejor_fitness)
-            historial_generaciones.append(gen)
-            print(f"Gen {gen} | Mejor fitness: {mejor_fitness}")
+        with perfilador.fase("registro"):
+            if callback is not None:
+                callback({'generacion': gen, 'mejor': mejor_fitness, 'media': sum(fitnesses) / len(fitnesses),
+                          'tasa_mutacion': tasa_mutacion, 'evaluaciones': evaluaciones})
+
+            # Registrar en historial cada 50 generaciones
+            if gen % 50 == 0:
+                historial_fitness.append(mejor_fitness)
+                historial_generaciones.append(gen)
+                print(f"Gen {gen} | Mejor fitness: {mejor_fitness}")
 
         # Verificar si encontramos solución perfecta
         if mejor_fitness == 0 and not solucion_encontrada:
@@ -319,16 +521,164 @@ def algoritmo_genetico(tablero_original, fijas, tamaño_poblacion=100, generacio
             print(f"\n🎉 ¡SOLUCIÓN PERFECTA ENCONTRADA EN GENERACIÓN {gen}!")
             break
 
+        # Control de convergencia: inyección, reinicio o parada por estancamiento
+        if controlador is not None:
+            with perfilador.fase("convergencia"):
+                accion = controlador.observar(fitnesses, convergencia.diversidad(poblacion))
+                if accion not in (None, convergencia.DETENER):
+                    conservar = controlador.conservar(accion, tamaño_poblacion, num_elite)
+                    poblacion, fitnesses, nuevas = renovar_poblacion(poblacion, fitnesses, conservar, contexto, rng)
+                    evaluaciones += nuevas
+            if accion == convergencia.DETENER:
+                print(f"\n⏹️ Estancado: se detiene en la generación {gen}")
+                break
+
+        if limite is not None and time.perf_counter() >= limite:
+            print(f"\n⏱️ Tiempo agotado en la generación {gen}")
+            break
+
     if not solucion_encontrada:
         print(f"\n⚠️ No se encontró solución perfecta en {generaciones} generaciones")
         print(f"Mejor fitness alcanzado: {mejor_fitness}")
 
-    return mejor_individuo, historial_generaciones, historial_fitness, generacion_solucion
+    print(f"🔢 Evaluaciones de fitness: {evaluaciones}")
+
+    return mejor_individuo, historial_generaciones, historial_fitness, generacion_solucion, evaluaciones
+
+# MODO ISLAS (varias subpoblaciones en paralelo con migración)
+
+# Evento compartido entre procesos: se activa cuando alguna isla llega a fitness 0
+_evento_solucion = None
+
+def _iniciar_isla(evento):
+    """Inicializador de cada proceso del pool: guarda el evento de parada"""
+    global _evento_solucion
+    _evento_solucion = evento
+
+def _evolucionar_isla(poblacion, fitnesses, contexto, generaciones, tasa_mutacion, num_elite, rng):
+    """
+    Ejecuta hasta `generaciones` generaciones de una isla dentro de un proceso.
+    Se detiene antes si esta u otra isla encuentra la solución.
+    Retorna (poblacion, fitnesses, mejores_por_generacion, rng); el generador
+    vuelve con su estado avanzado para el bloque siguiente.
+    """
+    mejores = []
+    for _ in range(generaciones):
+        if _evento_solucion is not None and _evento_solucion.is_set():
+            break
+        poblacion, fitnesses = evolucionar_generacion(poblacion, fitnesses, contexto, tasa_mutacion, num_elite,
+                                                      rng=rng)
+        mejores.append(min(fitnesses))
+        if mejores[-1] == 0:
+            if _evento_solucion is not None:
+                _evento_solucion.set()
+            break
+    return poblacion, fitnesses, mejores, rng
+
+def migrar_anillo(poblaciones, fitnesses, num_migrantes):
+    """
+    Cada isla envía copias de sus `num_migrantes` mejores tableros a la
+    siguiente isla del anillo, donde reemplazan a los peores.
+    """
+    n = len(poblaciones)
+    migrantes = []
+    for pob, fits in zip(poblaciones, fitnesses):
+        mejores = seleccion.mejores(fits, num_migrantes)
+        migrantes.append([([fila[:] for fila in pob[i]], fits[i]) for i in mejores])
+
+    for origen in range(n):
+        destino = (origen + 1) % n
+        pob, fits = poblaciones[destino], fitnesses[destino]
+        peores = seleccion.peores(fits, num_migrantes)
+        for i, (tablero, f) in zip(peores, migrantes[origen]):
+            pob[i] = tablero
+            fits[i] = f
+
+def algoritmo_genetico_islas(tablero_original, fijas, num_islas=4, tamaño_poblacion=100, generaciones=1000,
+                             intervalo_migracion=25, num_migrantes=2, tasa_mutacion=0.1, elitismo=0.1,
+                             procesos=None, semilla=None, candidatos=None):
+    """
+    Modelo de islas: `num_islas` subpoblaciones evolucionan en paralelo en un
+    ProcessPoolExecutor. Cada `intervalo_migracion` generaciones cada isla envía
+    sus `num_migrantes` mejores tableros a su vecina en el anillo. Todas las islas
+    se detienen en cuanto una llega a fitness 0.
+    Cada isla tiene su propio np.random.Generator derivado de `semilla`; la
+    corrida es reproducible salvo por el momento en que el evento de parada
+    corta a las demás islas.
+    Con `candidatos` (ver propagar_restricciones) los individuos y las
+    mutaciones de todas las islas se restringen a los dígitos posibles de cada celda.
+
+    Retorna (mejor_individuo, historiales, generacion_solucion, evaluaciones), donde
+    historiales[k] = (historial_generaciones, historial_fitness) de la isla k,
+    con el mismo formato que `algoritmo_genetico`.
+    """
+    # El pool de procesos solo se importa en modo islas
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    print("\n" + "="*60)
+    print(f"🏝️ INICIANDO ALGORITMO GENÉTICO EN {num_islas} ISLAS")
+    print("="*60)
+
+    num_elite = int(tamaño_poblacion * elitismo)
+    contexto = ContextoSudoku(tablero_original, fijas, candidatos)
+    generadores = np.random.default_rng(semilla).spawn(num_islas)
+    poblaciones = [[crear_individuo(contexto, rng) for _ in range(tamaño_poblacion)]
+                   for rng in generadores]
+    fitnesses = [[calcular_fitness(ind) for ind in pob] for pob in poblaciones]
+    evaluaciones = num_islas * tamaño_poblacion
+
+    mejores_isla = [min(fits) for fits in fitnesses]
+    historiales = [([0], [mejor]) for mejor in mejores_isla]
+    generacion_solucion = 0 if min(mejores_isla) == 0 else -1
+    gen = 0
+
+    mp = multiprocessing.get_context()
+    evento = mp.Event()
+    with ProcessPoolExecutor(max_workers=procesos or num_islas, mp_context=mp,
+                             initializer=_iniciar_isla, initargs=(evento,)) as pool:
+        while gen < generaciones and generacion_solucion < 0:
+            bloque = min(intervalo_migracion, generaciones - gen)
+            futuros = [pool.submit(_evolucionar_isla, poblaciones[k], fitnesses[k], contexto,
+                                   bloque, tasa_mutacion, num_elite, generadores[k])
+                       for k in range(num_islas)]
+
+            for k, futuro in enumerate(futuros):
+                poblaciones[k], fitnesses[k], mejores, generadores[k] = futuro.result()
+                evaluaciones += len(mejores) * (tamaño_poblacion - num_elite)
+                historial_generaciones, historial_fitness = historiales[k]
+                for paso, mejor in enumerate(mejores, start=gen + 1):
+                    mejores_isla[k] = min(mejores_isla[k], mejor)
+                    if paso % 50 == 0 or mejor == 0:
+                        historial_generaciones.append(paso)
+                        historial_fitness.append(mejores_isla[k])
+                    if mejor == 0 and (generacion_solucion < 0 or paso < generacion_solucion):
+                        generacion_solucion = paso
+
+            gen += bloque
+            print(f"Gen {gen} | Mejor fitness por isla: {mejores_isla}")
+
+            if generacion_solucion < 0:
+                migrar_anillo(poblaciones, fitnesses, num_migrantes)
+
+    mejor_k = min(range(num_islas), key=lambda k: min(fitnesses[k]))
+    mejor_individuo = poblaciones[mejor_k][fitnesses[mejor_k].index(min(fitnesses[mejor_k]))]
+
+    if generacion_solucion >= 0:
+        print(f"\n🎉 ¡SOLUCIÓN PERFECTA ENCONTRADA EN GENERACIÓN {generacion_solucion} (isla {mejor_k})!")
+    else:
+        print(f"\n⚠️ No se encontró solución perfecta en {generaciones} generaciones")
+        print(f"Mejor fitness alcanzado: {min(mejores_isla)}")
+    print(f"🔢 Evaluaciones de fitness: {evaluaciones}")
+
+    return mejor_individuo, historiales, generacion_solucion, evaluaciones
 
 def mostrar_proceso_evolutivo(historial_generaciones, historial_fitness):
     """
     Muestra un diagrama del proceso evolutivo
     """
+    import matplotlib.pyplot as plt  # Solo se carga si se pide la gráfica
+
     plt.figure(figsize=(12, 6))
     plt.plot(historial_generaciones, historial_fitness, 'b-', linewidth=2, marker='o', markersize=4)
     plt.title('Proceso Evolutivo - Algoritmo Genético Sudoku', fontsize=14, fontweight='bold')
@@ -346,4 +696,61 @@ def mostrar_proceso_evolutivo(historial_generaciones, historial_fitness):
              verticalalignment='top', bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.8))
     
     plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+def main():
+    """Demostración completa: representación, verificaciones y algoritmo genético"""
+    print("="*50)
+    print("PROYECTO: SUDOKU CON ALGORITMOS GENÉTICOS")
+    print("="*50)
+    print("\nSudoku inicial cargado correctamente")
+    print(f"Celdas vacías: {sum(row.count(0) for row in sudoku_inicial)}")
+
+    # Probar visualización
+    mostrar_sudoku(sudoku_inicial, "SUDOKU INICIAL")
+    print(f"\nCeldas vacías: {sum(row.count(0) for row in sudoku_inicial)}")
+
+    # Probar
+    posiciones_fijas = obtener_posiciones_fijas(sudoku_inicial)
+    estadisticas_tablero(sudoku_inicial, posiciones_fijas)
+    contexto = ContextoSudoku(sudoku_inicial, posiciones_fijas)
+
+    # Probar creación de individuo
+    print("\n" + "="*50)
+    print("CREACIÓN DE INDIVIDUO")
+    print("="*50)
+
+    individuo_test = crear_individuo(contexto)
+    mostrar_sudoku(individuo_test, "INDIVIDUO GENERADO (tablero completo)")
+
+    # Verificar que no hay repeticiones en filas
+    print("\n✓ Verificando que no haya repeticiones en filas...")
+    for i, fila in enumerate(individuo_test):
+        if len(set(fila)) != 9:
+            print(f"  ⚠ Error en fila {i+1}")
+        else:
+            print(f"  ✓ Fila {i+1}: OK")
+    print("✓ Todas las filas tienen números del 1-9 sin repetir")
+
+    # Crear población inicial
+    TAMAÑO_POBLACION = 50  # Empezamos con 50 para pruebas
+    poblacion = crear_poblacion(contexto, TAMAÑO_POBLACION)
+
+    # Mostrar muestra
+    mostrar_muestra_poblacion(poblacion, 2)
+
+    print("\n" + "="*50)
+    print("PARTE 1 COMPLETADA: Representación del individuo ✓")
+    print("="*50)
+
+    print("\n✓ Verificando fitness incremental contra recálculo completo...")
+    verificar_delta(contexto)
+    print("✓ Fitness incremental correcto en intercambios aleatorios")
+
+    # PARTE 2: ejecutar el algoritmo genético y graficar su evolución
+    mejor, historial_generaciones, historial_fitness, _, _ = algoritmo_genetico(sudoku_inicial, posiciones_fijas)
+    mostrar_sudoku(mejor, "MEJOR SOLUCIÓN ENCONTRADA")
+    mostrar_proceso_evolutivo(historial_generaciones, historial_fitness)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Solucionador exacto de Sudoku por backtracking con máscaras de bits.
+
+Cada fila, columna y caja guarda una máscara con los dígitos ya usados
+(bit v = dígito v). En cada paso se elige la celda vacía con menos
+candidatos (MRV) y se prueban sus dígitos; si una celda se queda sin
+candidatos se retrocede. Usa el mismo formato de tablero que el algoritmo
+genético: lista de N listas con 0 en las celdas vacías (N = 9, 16, 25...).
+Las máscaras son enteros de N + 1 bits, así que el mismo código sirve para
+cualquier tamaño.
+"""
+import time
+
+from contexto import cajas_de, tamaño_caja
+
+# Cantidad de bits encendidos de cada máscara posible de 9x9
+BITS = [bin(m).count("1") for m in range(1 << 10)]
+
+# Cada cuántos nodos se revisa el presupuesto de tiempo
+NODOS_POR_CONTROL = 256
+
+
+def _contar_bits(mascara):
+    """Bits encendidos de una máscara de cualquier tamaño (int.bit_count es de Python 3.10+)"""
+    return bin(mascara).count("1")
+
+
+def _mascaras(tablero):
+    """
+    Máscaras de dígitos usados por fila, columna y caja, la lista de celdas
+    vacías y (todos, contar_bits, caja_de) para el tamaño del tablero.
+    Retorna None si las pistas repiten un dígito.
+    """
+    lado = len(tablero)
+    caja_de = cajas_de(tamaño_caja(lado))
+    filas, cols, cajas = [0] * lado, [0] * lado, [0] * lado
+    vacias = []
+    for i in range(lado):
+        for j in range(lado):
+            v = tablero[i][j]
+            if v == 0:
+                vacias.append((i, j))
+                continue
+            bit = 1 << v
+            if (filas[i] | cols[j] | cajas[caja_de[i][j]]) & bit:
+                return None  # Dígito repetido en las pistas
+            filas[i] |= bit
+            cols[j] |= bit
+            cajas[caja_de[i][j]] |= bit
+    todos = (1 << (lado + 1)) - 2
+    contar_bits = BITS.__getitem__ if lado == 9 else _contar_bits
+    return filas, cols, cajas, vacias, todos, contar_bits, caja_de
+
+
+def resolver_exacto(tablero_original, limite_segundos=None):
+    """
+    Resuelve el tablero de forma exacta.
+    Retorna el tablero resuelto, o None si el sudoku no tiene solución.
+    Lanza TimeoutError si se supera `limite_segundos`.
+    """
+    tablero = [fila[:] for fila in tablero_original]
+    mascaras = _mascaras(tablero)
+    if mascaras is None:
+        return None
+    filas, cols, cajas, vacias, todos, contar_bits, caja_de = mascaras
+
+    limite = None if limite_segundos is None else time.perf_counter() + limite_segundos
+    nodos = [0]
+
+    def buscar(pendientes):
+        if not pendientes:
+            return True
+
+        nodos[0] += 1
+        if limite is not None and nodos[0] % NODOS_POR_CONTROL == 0 and time.perf_counter() > limite:
+            raise TimeoutError(f"Presupuesto de {limite_segundos} s agotado")
+
+        # MRV: celda con menos candidatos
+        mejor, mejor_mascara, mejor_n = 0, 0, len(tablero) + 1
+        for k, (i, j) in enumerate(pendientes):
+            mascara = todos & ~(filas[i] | cols[j] | cajas[caja_de[i][j]])
+            n = contar_bits(mascara)
+            if n < mejor_n:
+                mejor, mejor_mascara, mejor_n = k, mascara, n
+                if n <= 1:
+                    break
+        if mejor_n == 0:
+            return False
+
+        i, j = pendientes[mejor]
+        c = caja_de[i][j]
+        resto = pendientes[:mejor] + pendientes[mejor + 1:]
+        mascara = mejor_mascara
+        while mascara:
+            bit = mascara & -mascara
+            mascara ^= bit
+            filas[i] |= bit
+            cols[j] |= bit
+            cajas[c] |= bit
+            if buscar(resto):
+                tablero[i][j] = bit.bit_length() - 1
+                return True
+            filas[i] ^= bit
+            cols[j] ^= bit
+            cajas[c] ^= bit
+        return False
+
+    return tablero if buscar(vacias) else None
+
+
+def contar_soluciones(tablero, limite=2):
+    """Cuenta las soluciones del tablero, deteniéndose al llegar a `limite`"""
+    mascaras = _mascaras(tablero)
+    if mascaras is None:
+        return 0
+    filas, cols, cajas, vacias, todos, contar_bits, caja_de = mascaras
+
+    def contar(pendientes):
+        if not pendientes:
+            return 1
+        mejor, mejor_mascara, mejor_n = 0, 0, len(tablero) + 1
+        for k, (i, j) in enumerate(pendientes):
+            mascara = todos & ~(filas[i] | cols[j] | cajas[caja_de[i][j]])
+            n = contar_bits(mascara)
+            if n < mejor_n:
+                mejor, mejor_mascara, mejor_n = k, mascara, n
+                if mejor_n <= 1:
+                    break
+        i, j = pendientes[mejor]
+        c = caja_de[i][j]
+        resto = pendientes[:mejor] + pendientes[mejor + 1:]
+        total = 0
+        mascara = mejor_mascara
+        while mascara and total < limite:
+            bit = mascara & -mascara
+            mascara ^= bit
+            filas[i] |= bit
+            cols[j] |= bit
+            cajas[c] |= bit
+            total += contar(resto)
+            filas[i] ^= bit
+            cols[j] ^= bit
+            cajas[c] ^= bit
+        return total
+
+    return contar(vacias)
+
+
+def solucion_base(caja=3):
+    """
+    Una solución completa con cajas de `caja` x `caja`. En 9x9 es la del
+    solucionador sobre el tablero vacío (la de siempre, para no cambiar los
+    corpus sembrados); en tamaños mayores, donde el backtracking sobre un
+    tablero vacío explota, se arma con el patrón de bandas desplazadas.
+    """
+    lado = caja * caja
+    if caja == 3:
+        return resolver_exacto([[0] * lado for _ in range(lado)])
+    return [[(caja * (i % caja) + i // caja + j) % lado + 1 for j in range(lado)] for i in range(lado)]
+
+
+def generar_puzzle(pistas, rng, caja=3, unica=True):
+    """
+    Genera un sudoku con cajas de `caja` x `caja` y alrededor de `pistas`
+    celdas fijas. Parte de una solución completa permutada al azar (dígitos,
+    filas dentro de cada banda, bandas y transposición) y quita celdas; con
+    `unica` solo mientras la solución siga siendo única (en 16x16 y 25x25 ese
+    control es caro: con unica=False se quitan sin comprobar).
+    `rng` es un random.Random, para que sea reproducible.
+    """
+    lado = caja * caja
+    base = solucion_base(caja)
+    digitos = list(range(1, lado + 1))
+    rng.shuffle(digitos)
+    bandas = rng.sample(range(caja), caja)
+    orden_filas = [b * caja + f for b in bandas for f in rng.sample(range(caja), caja)]
+    pilas = rng.sample(range(caja), caja)
+    orden_cols = [p * caja + c for p in pilas for c in rng.sample(range(caja), caja)]
+    completo = [[digitos[base[i][j] - 1] for j in orden_cols] for i in orden_filas]
+    if rng.random() < 0.5:
+        completo = [list(col) for col in zip(*completo)]
+
+    tablero = [fila[:] for fila in completo]
+    celdas = [(i, j) for i in range(lado) for j in range(lado)]
+    rng.shuffle(celdas)
+    restantes = lado * lado
+    for i, j in celdas:
+        if restantes <= pistas:
+            break
+        v = tablero[i][j]
+        tablero[i][j] = 0
+        if unica and contar_soluciones(tablero) != 1:
+            tablero[i][j] = v
+        else:
+            restantes -= 1
+    return tablero
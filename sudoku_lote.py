@@ -0,0 +1,303 @@
+"""
+Resolución de Sudokus en lote.
+
+Lee puzzles en formato .sdm (una línea de 81 caracteres por puzzle: dígitos
+1-9 para celdas fijas, 0 o '.' para celdas vacías), los resuelve en paralelo
+en un pool de procesos y escribe las soluciones en el mismo orden de entrada,
+a medida que van terminando.
+
+Uso:
+    python sudoku_lote.py puzzles.sdm -o soluciones.sdm --workers 8
+"""
+import argparse
+import collections
+import contextlib
+import io
+import math
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import convergencia
+import sudoku
+import sudoku_exacto
+
+# Modos de resolución disponibles
+MODOS = ("ga", "exacto", "hibrido")
+
+
+# ---------------- FORMATO .sdm ----------------
+def leer_puzzle(linea):
+    """Convierte una línea de 81 caracteres en un tablero 9x9 (0 = vacío)"""
+    linea = linea.strip()
+    if len(linea) != 81:
+        raise ValueError(f"Se esperaban 81 caracteres, se recibieron {len(linea)}")
+    valores = [0 if c in ".0" else int(c) for c in linea]
+    return [valores[i * 9:(i + 1) * 9] for i in range(9)]
+
+
+def a_linea(tablero):
+    """Convierte un tablero 9x9 en una línea de 81 caracteres"""
+    return "".join(str(v) for fila in tablero for v in fila)
+
+
+def leer_archivo(ruta):
+    """Genera los puzzles de un archivo .sdm sin cargarlo entero en memoria"""
+    with open(ruta) as archivo:
+        for linea in archivo:
+            if linea.strip() and not linea.startswith("#"):
+                yield leer_puzzle(linea)
+
+
+# ---------------- RESOLUCIÓN ----------------
+def resolver_uno(tablero, tamaño_poblacion=100, generaciones=1000, propagar=False, modo="ga", presupuesto=0.1,
+                 adaptativo=False, semilla=None, tiempo_maximo=None, islas=0):
+    """
+    Resuelve un tablero sin imprimir nada.
+
+    Modos:
+    - "ga": algoritmo genético (con `propagar`, antes se propagan restricciones)
+    - "exacto": backtracking con máscaras de bits, sin límite de tiempo
+    - "hibrido": solucionador exacto con `presupuesto` segundos; si se agota,
+      algoritmo genético con propagación
+
+    Con `adaptativo`, el GA usa un convergencia.ControladorConvergencia
+    (mutación adaptativa, inyección y reinicio por estancamiento). Con la
+    misma `semilla`, el GA repite exactamente la misma corrida.
+
+    Con `islas` > 1 el GA es sudoku.algoritmo_genetico_islas con esa cantidad
+    de islas (y los candidatos de la propagación si hay `propagar`); ese modelo
+    no admite `adaptativo` ni `tiempo_maximo`.
+
+    Con `tiempo_maximo` (segundos) la resolución no pasa de ese tiempo: el
+    modo "exacto" lanza TimeoutError al agotarlo, "hibrido" recorta el
+    presupuesto del exacto y el GA retorna el mejor tablero que tenga.
+
+    Retorna un dict con 'solucion', 'fitness', 'generacion', 'segundos' y
+    'metodo' ("exacto" o "ga", el camino que dio la respuesta). Si el sudoku
+    no tiene solución, 'fitness' es None.
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo desconocido: {modo!r} (opciones: {', '.join(MODOS)})")
+    if islas > 1 and (adaptativo or tiempo_maximo is not None):
+        raise ValueError("El modelo de islas no admite adaptativo ni tiempo_maximo")
+    inicio = time.perf_counter()
+
+    if modo != "ga":
+        limite = presupuesto if modo == "hibrido" else None
+        if tiempo_maximo is not None:
+            limite = tiempo_maximo if limite is None else min(limite, tiempo_maximo)
+        try:
+            solucion = sudoku_exacto.resolver_exacto(tablero, limite)
+        except TimeoutError:
+            if modo == "exacto":
+                raise
+            propagar = True
+        else:
+            return {
+                'solucion': solucion or tablero,
+                'fitness': 0 if solucion else None,
+                'generacion': 0 if solucion else -1,
+                'segundos': time.perf_counter() - inicio,
+                'metodo': "exacto",
+            }
+
+    controlador = convergencia.ControladorConvergencia(0.1) if adaptativo else None
+    if tiempo_maximo is not None:
+        tiempo_maximo = max(0.0, tiempo_maximo - (time.perf_counter() - inicio))
+    with contextlib.redirect_stdout(io.StringIO()):
+        if islas > 1:
+            try:
+                reducido, candidatos = sudoku.propagar_restricciones(tablero) if propagar else (tablero, None)
+            except ValueError:
+                return _sin_solucion(tablero, inicio)
+            mejor, _, generacion, _ = sudoku.algoritmo_genetico_islas(
+                reducido, sudoku.obtener_posiciones_fijas(reducido), islas, tamaño_poblacion, generaciones,
+                semilla=semilla, candidatos=candidatos)
+        elif propagar:
+            try:
+                mejor, _, _, generacion, _ = sudoku.resolver_con_propagacion(
+                    tablero, tamaño_poblacion=tamaño_poblacion, generaciones=generaciones, controlador=controlador,
+                    semilla=semilla, tiempo_maximo=tiempo_maximo)
+            except ValueError:
+                return _sin_solucion(tablero, inicio)
+        else:
+            fijas = sudoku.obtener_posiciones_fijas(tablero)
+            mejor, _, _, generacion, _ = sudoku.algoritmo_genetico(tablero, fijas, tamaño_poblacion, generaciones,
+                                                                   controlador=controlador, semilla=semilla,
+                                                                   tiempo_maximo=tiempo_maximo)
+    return {
+        'solucion': mejor,
+        'fitness': sudoku.calcular_fitness(mejor),
+        'generacion': generacion,
+        'segundos': time.perf_counter() - inicio,
+        'metodo': "ga",
+    }
+
+
+def _sin_solucion(tablero, inicio):
+    """Resultado del GA cuando la propagación deja una celda sin candidatos"""
+    return {
+        'solucion': tablero,
+        'fitness': None,
+        'generacion': -1,
+        'segundos': time.perf_counter() - inicio,
+        'metodo': "ga",
+    }
+
+
+def resolver_en_flujo(puzzles, workers=None, cache=None, **opciones):
+    """
+    Resuelve un iterable de tableros en un pool de procesos y genera los
+    resultados en el orden de entrada, en cuanto cada uno está listo.
+    Solo mantiene unos pocos puzzles en vuelo por proceso, de modo que la
+    entrada puede ser un flujo de millones de líneas.
+    Con `cache` (cache_sudoku.CacheSoluciones), los puzzles equivalentes a uno
+    ya resuelto no llegan al pool y cada solución nueva se guarda.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        en_vuelo = collections.deque()
+        limite = 4 * workers
+
+        def siguiente():
+            tablero, futuro = en_vuelo.popleft()
+            resultado = futuro.result()
+            if cache is not None and resultado['metodo'] != "cache":
+                cache.registrar(tablero, resultado)
+            return resultado
+
+        for tablero in puzzles:
+            acierto = cache.consultar(tablero) if cache is not None else None
+            if acierto is not None:
+                futuro = Future()
+                futuro.set_result(acierto)
+            else:
+                futuro = pool.submit(resolver_uno, tablero, **opciones)
+            en_vuelo.append((tablero, futuro))
+            if len(en_vuelo) >= limite:
+                yield siguiente()
+        while en_vuelo:
+            yield siguiente()
+
+
+def solve_many(puzzles, workers=None, **opciones):
+    """Resuelve muchos tableros en paralelo; retorna la lista de resultados en orden"""
+    return list(resolver_en_flujo(puzzles, workers, **opciones))
+
+
+def comparar_propagacion(puzzles, workers=None, **opciones):
+    """
+    Resuelve cada puzzle sin y con propagación de restricciones.
+    Retorna una lista de (generacion_sin, generacion_con); -1 = no resuelto.
+    """
+    puzzles = list(puzzles)
+    sin = solve_many(puzzles, workers, propagar=False, **opciones)
+    con = solve_many(puzzles, workers, propagar=True, **opciones)
+    return [(a['generacion'], b['generacion']) for a, b in zip(sin, con)]
+
+
+# ---------------- MÉTRICAS ----------------
+def percentil(valores, p):
+    """Percentil p (0-100) por rango más cercano de una lista ya ordenada"""
+    if not valores:
+        return 0.0
+    k = max(0, min(len(valores) - 1, math.ceil(p / 100 * len(valores)) - 1))
+    return valores[k]
+
+
+def resumen(latencias, segundos_totales, sin_resolver):
+    """Texto con puzzles/seg y latencias p50/p99"""
+    latencias = sorted(latencias)
+    n = len(latencias)
+    return (f"Puzzles: {n} | Sin resolver: {sin_resolver} | "
+            f"{n / segundos_totales if segundos_totales else 0:.2f} puzzles/seg | "
+            f"p50: {percentil(latencias, 50) * 1000:.1f} ms | "
+            f"p99: {percentil(latencias, 99) * 1000:.1f} ms")
+
+
+# ---------------- CLI ----------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resuelve en lote Sudokus en formato .sdm")
+    parser.add_argument("entrada", help="archivo .sdm (una línea de 81 caracteres por puzzle)")
+    parser.add_argument("-o", "--salida", help="archivo de soluciones (por defecto, salida estándar)")
+    parser.add_argument("--workers", type=int, default=None, help="procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--poblacion", type=int, default=100, help="tamaño de población del algoritmo genético")
+    parser.add_argument("--generaciones", type=int, default=1000, help="generaciones máximas por puzzle")
+    parser.add_argument("--propagar", action="store_true", help="propagar restricciones antes del GA")
+    parser.add_argument("--modo", choices=MODOS, default="ga",
+                        help="ga, exacto, o hibrido (exacto con presupuesto y GA como respaldo)")
+    parser.add_argument("--presupuesto", type=float, default=0.1,
+                        help="segundos del solucionador exacto en modo hibrido")
+    parser.add_argument("--adaptativo", action="store_true",
+                        help="GA con control de convergencia (mutación adaptativa y reinicios)")
+    parser.add_argument("--islas", type=int, default=0,
+                        help="GA en modelo de islas con esta cantidad de islas (cada una en su proceso)")
+    parser.add_argument("--comparar", action="store_true",
+                        help="comparar generaciones hasta la solución sin y con propagación")
+    parser.add_argument("--semilla", type=int, help="semilla del GA para cada puzzle (resultados reproducibles)")
+    parser.add_argument("--cache", nargs="?", const="", metavar="SQLITE",
+                        help="reutilizar soluciones de puzzles repetidos o simétricos (en memoria, o también en SQLITE)")
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        filas = comparar_propagacion(leer_archivo(args.entrada), args.workers,
+                                     tamaño_poblacion=args.poblacion, generaciones=args.generaciones,
+                                     semilla=args.semilla)
+        print(f"{'PUZZLE':<8} | {'SIN PROPAGACIÓN':>16} | {'CON PROPAGACIÓN':>16}")
+        for n, (sin, con) in enumerate(filas, start=1):
+            print(f"{n:<8} | {sin if sin >= 0 else '—':>16} | {con if con >= 0 else '—':>16}")
+        resueltos = [sum(1 for fila in filas if fila[k] >= 0) for k in (0, 1)]
+        print(f"Resueltos: {resueltos[0]}/{len(filas)} sin propagación, {resueltos[1]}/{len(filas)} con propagación")
+        return
+
+    cache = None
+    if args.cache is not None:
+        # Solo se importa si se pide: cache_sudoku depende de este módulo
+        import cache_sudoku
+        cache = cache_sudoku.CacheSoluciones(ruta=args.cache or None)
+
+    salida = open(args.salida, "w") if args.salida else sys.stdout
+    latencias = []
+    sin_resolver = 0
+    por_metodo = collections.Counter()
+    inicio = time.perf_counter()
+    try:
+        resultados = resolver_en_flujo(leer_archivo(args.entrada), args.workers, cache,
+                                       tamaño_poblacion=args.poblacion,
+                                       generaciones=args.generaciones,
+                                       propagar=args.propagar,
+                                       modo=args.modo,
+                                       presupuesto=args.presupuesto,
+                                       adaptativo=args.adaptativo,
+                                       semilla=args.semilla,
+                                       islas=args.islas)
+        for n, resultado in enumerate(resultados, start=1):
+            salida.write(a_linea(resultado['solucion']) + "\n")
+            salida.flush()
+            latencias.append(resultado['segundos'])
+            por_metodo[resultado['metodo']] += 1
+            if resultado['fitness'] is None:
+                sin_resolver += 1
+                print(f"⚠️ Puzzle {n}: no tiene solución", file=sys.stderr)
+            elif resultado['fitness'] != 0:
+                sin_resolver += 1
+                print(f"⚠️ Puzzle {n}: quedan {resultado['fitness']} conflictos", file=sys.stderr)
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+    print(resumen(latencias, time.perf_counter() - inicio, sin_resolver), file=sys.stderr)
+    print("Respondidos por: " + ", ".join(f"{m} {n}" for m, n in sorted(por_metodo.items())), file=sys.stderr)
+    if cache is not None:
+        estadisticas = cache.estadisticas()
+        print(f"Cache: {estadisticas['tasa_acierto']:.1%} de aciertos "
+              f"({estadisticas['aciertos_memoria']} en memoria, {estadisticas['aciertos_disco']} en disco) | "
+              f"búsqueda media {estadisticas['busqueda']['media'] * 1000:.2f} ms, "
+              f"p99 <= {estadisticas['busqueda']['p99'] * 1000:g} ms", file=sys.stderr)
+        cache.cerrar()
+
+
+if __name__ == "__main__":
+    main()